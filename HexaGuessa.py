@@ -5,16 +5,27 @@
 # Date: 11/08/25
 # Description: A hex code guessing game
 # ======================================
-import json
-import math
+import collections
+import functools
 import os
-import random
 import re
-import webbrowser
+import time
 import tkinter as tk
-from tkinter import messagebox, scrolledtext
+from tkinter import messagebox
+import gameengine
+from gameengine import (DIFFICULTY_EXPERT, DIFFICULTY_PRACTICE,
+                        DIFFICULTY_STANDARD, HEX_LENGTH,
+                        MAX_ALLOWED_GUESSES, GameEngine, max_guesses_for)
+# Everything else (json, webbrowser, scrolledtext, asyncio, sqlite3, the
+# score stores, replays and verification) is imported where it's first
+# used, so the window can appear without waiting for modules most
+# sessions never need. re isn't put off since tkinter imports it anyway.
 """Constants."""
 
+# When the game started loading (near enough, the imports above are
+# quick), to see how long the window takes to appear (see
+# HexGame.finish_starting)
+STARTED_AT = time.perf_counter()
 # Window Dimensions
 WINDOW_WIDTH = 500
 WINDOW_HEIGHT = 920
@@ -25,29 +36,59 @@ CANVAS_HEIGHT = 200
 # guessed colour
 COLOUR_BOX_HEIGHT = 150
 COLOUR_BOX_WIDTH = 150
-# The length of each colour guess, ie the length of a Colour Hex Code
-HEX_LENGTH = 6
-# The number of guesses allowed in the main game before it is Game Over
-MAX_ALLOWED_GUESSES = 8
-# How helpful are the error margin indicators.
-# 2 is very easy - must be a value 2 or greater
-ERR_INDICATOR_DIFFICULTY = 2
+# The colour of those boxes before there's anything to show
+EMPTY_BOX_COLOUR = "#888888"
+# The game rules (HEX_LENGTH, MAX_ALLOWED_GUESSES,
+# ERR_INDICATOR_DIFFICULTY and the difficulty levels) live in
+# gameengine.py, so they can be used without Tk.
 # The tag used for headings in the help text.
 # This is the only one we're doing for now, but we could add more later.
 TAG_HEADING = "heading"
+# How long (in milliseconds) the window should take to appear, on a
+# kiosk cold start (check with: python HexaGuessa.py --startup-time)
+FIRST_PAINT_TARGET_MS = 250
 # Files
 LOGO_IMAGE = "hexaguessa.png"
 HIGH_SCORE_FILE = "highscores.json"
+GAME_HISTORY_FILE = "gamehistory.db"
+REPLAY_FILE = "replays.hxr"
+# Set this environment variable to a score server's address (see
+# scoreserver.py), eg tcp://scores.example.com:8765, to share one
+# leaderboard between sites instead of using HIGH_SCORE_FILE
+SCORE_SERVER_VARIABLE = "HEXAGUESSA_SCORE_SERVER"
+# Scores waiting to be sent to the score server
+OUTBOX_FILE = "outbox.jsonl"
+# How long (in seconds) saving a score waits for it to reach the score
+# server, so the high score screen shows it
+OUTBOX_WAIT = 2
 HTML_FILE_TO_OPEN = "help.html"
 HELP_TEXT_FILE = "help.txt"
-# Difficulty levels for the game
-DIFFICULTY_STANDARD = "Standard"
-DIFFICULTY_EXPERT = "Expert"
 # Button colours
 DEFAULT_BUTTON_COLOUR = "light blue"
 DEFAULT_ACTIVE_BUTTON_COLOUR = "dark blue"
 # Font
 FONT = "Arial Rounded MT Bold"
+# How long (in milliseconds) each guess is shown for when watching a
+# replay
+REPLAY_STEP_MS = 1000
+# How the previous guesses are shown: "canvas" draws them all on one
+# Canvas, with a swatch of each guess's colour, and a new guess only
+# changes one row (see CanvasGuessGrid). "widgets" is the original grid
+# of a Label for every hint and an Entry for every digit, which has to
+# check every row for each guess.
+GUESS_GRID_RENDERER = "canvas"
+# Sizes (in pixels) for the canvas guess grid: the width of each digit,
+# and the height of the hints and digits in each guess
+GUESS_CELL_WIDTH = 50
+GUESS_HINT_HEIGHT = 24
+GUESS_DIGIT_HEIGHT = 48
+# The size of the swatch showing each guess's colour
+GUESS_SWATCH_SIZE = 40
+# The colour of a digit's box, like a disabled Entry
+GUESS_CELL_COLOUR = "#f0f0f0"
+# How many of the newest guesses a Practice game can scroll back
+# through, so the history doesn't grow however long the game goes on
+PRACTICE_HISTORY_LIMIT = 1000
 
 
 # main
@@ -64,24 +105,149 @@ class HexGame(tk.Tk):
         self.geometry(f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}")
         self.minsize(WINDOW_WIDTH, WINDOW_HEIGHT)
         self.difficulty = DIFFICULTY_STANDARD
+        # The async loop is only set up the first time it's used, and
+        # the high scores, game history and outbox are opened on its
+        # background thread the first time they're needed (see below),
+        # so none of it holds up the window appearing.
+        # How long the window took to appear (seconds), once it has
+        self.first_paint_time = None
+        # Things to do once the window has appeared
+        self.first_paint_jobs = []
+        self.finish_scheduled = False
+        self.bind("<Expose>", self.first_expose, add="+")
+        # Scores left in the outbox last time are sent once the window
+        # is up
+        self.after_first_paint(self.start_outbox)
+        # Closing the window should also wait for scores to be saved
+        self.protocol("WM_DELETE_WINDOW", self.exit_game)
         # configure grid for centering content
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
         # To keep track of currently displayed frame
         self.current_frame = None
+        # Screens that are kept once built (see switch_frame), by class
+        self.frame_cache = {}
         self.show_menu_screen()
 
+    @functools.cached_property
+    def async_loop(self):
+        """Screens do anything slow in coroutines run by this"""
+        from tkasync import TkAsyncLoop
+        return TkAsyncLoop(self, error_handler=self.show_background_error)
+
+    def show_background_error(self, error):
+        """Something done in the background went wrong and nothing else
+            dealt with it (it has been logged as well)
+            error is the exception raised
+        """
+        messagebox.showerror("Error",
+                             f"Something went wrong in the background:"
+                             f"\n{error}")
+
+    async def open_high_scores(self):
+        """The high scores, shared by every screen so the file is only
+            read again when it changes. They're opened on the background
+            thread the first time (which can mean reading a file or
+            connecting to a database).
+            Only use them through async_loop.run_blocking, so the window
+            doesn't freeze while the file is read or written
+        """
+        from scorestore import open_score_store
+        return await self.async_loop.run_blocking_once(
+            "high_scores",
+            open_score_store,
+            os.environ.get(SCORE_SERVER_VARIABLE) or HIGH_SCORE_FILE)
+
+    async def open_game_history(self):
+        """Every finished game, for the statistics screen (also opened
+            in the background, and only used through
+            async_loop.run_blocking)
+        """
+        from gamehistory import GameHistory
+        return await self.async_loop.run_blocking_once("game_history",
+                                                       GameHistory,
+                                                       GAME_HISTORY_FILE)
+
+    async def open_outbox(self):
+        """New scores for a score server go through the outbox, so they
+            aren't lost if it can't be reached (None for a local file).
+            It reads and starts sending what's left from last time, so
+            that's done in the background too.
+        """
+        high_scores = await self.open_high_scores()
+        if not hasattr(high_scores, "add_submissions"):
+            return None
+        from outbox import Outbox
+        return await self.async_loop.run_blocking_once("outbox",
+                                                       Outbox,
+                                                       OUTBOX_FILE,
+                                                       high_scores)
+
+    def start_outbox(self):
+        """Start sending any scores still waiting in the outbox"""
+        self.async_loop.spawn(self.open_outbox())
+
+    def first_expose(self, event):
+        """The window is being drawn. The first time, finish starting up
+            as soon as the drawing is done.
+        """
+        if not self.finish_scheduled:
+            self.finish_scheduled = True
+            self.after_idle(self.finish_starting)
+
+    def finish_starting(self):
+        """The window has appeared: note how long that took, then do
+            what was put off until now
+        """
+        # Let everything waiting to be drawn be drawn first
+        self.update_idletasks()
+        self.first_paint_time = time.perf_counter() - STARTED_AT
+        jobs, self.first_paint_jobs = self.first_paint_jobs, []
+        for job in jobs:
+            job()
+
+    def after_first_paint(self, job):
+        """Run job once the window has appeared (or straight away if it
+            already has), eg loading something slow
+        """
+        if self.first_paint_time is None:
+            self.first_paint_jobs.append(job)
+        else:
+            job()
+
     def switch_frame(self, frame_class):
         """Remove current frame and switch to new.
         ie moving from screen to screen
+        Screens with keep_alive set are only built the first time, and
+        are hidden rather than destroyed when we move away, so coming
+        back to them is instant. If they have a refresh method it is
+        called each time they are shown again, to update anything that
+        might have changed.
         frame_class is the window we are going to change to
         """
-        if self.current_frame:
-            self.current_frame.destroy()  # remove old frame
-        new_frame = frame_class(self)
+        self.leave_current_frame()
+        new_frame = self.frame_cache.get(frame_class)
+        if new_frame is None:
+            new_frame = frame_class(self)
+            if getattr(frame_class, "keep_alive", False):
+                self.frame_cache[frame_class] = new_frame
+        elif hasattr(new_frame, "refresh"):
+            new_frame.refresh()
         self.current_frame = new_frame
         self.current_frame.grid(row=0, column=0, sticky="nsew")
 
+    def leave_current_frame(self):
+        """Hide the current frame if it is kept (see switch_frame),
+            otherwise destroy it
+        """
+        if not self.current_frame:
+            return
+        if self.current_frame in self.frame_cache.values():
+            self.current_frame.grid_remove()
+        else:
+            self.current_frame.destroy()  # remove old frame
+        self.current_frame = None
+
     def show_menu_screen(self):
         """Main menu."""
         self.switch_frame(MenuScreen)
@@ -92,6 +258,18 @@ class HexGame(tk.Tk):
 
     def exit_game(self):
         """End everything and close the game."""
+        # Leaving the current screen cancels anything it was loading,
+        # then let any score that is still being saved finish.
+        # Only what has been started needs stopping (see async_loop and
+        # open_outbox)
+        if self.current_frame:
+            self.current_frame.destroy()
+            self.current_frame = None
+        if "async_loop" in self.__dict__:
+            self.async_loop.stop()
+            outbox = self.async_loop.once_result("outbox")
+            if outbox is not None:
+                outbox.stop()
         self.destroy()
 
     def show_game(self, difficulty):
@@ -107,19 +285,372 @@ class HexGame(tk.Tk):
         """Display high scores screen."""
         self.switch_frame(HighScoreScreen)
 
-    def show_enter_high_score_screen(self, score):
+    def show_stats_screen(self):
+        """Display the statistics screen."""
+        self.switch_frame(StatsScreen)
+
+    def show_enter_high_score_screen(self, score, replay_data):
         """Player gets a high score show this screen.
         This screen will only ever be entered from PlayGame,
         ie the player cannot navigate to this page from a menu etc
         score is a decimal value
+        replay_data is the bytes of the game's replay, which the score
+         is checked against before it is saved
         """
         self.score = score
-        if self.current_frame:
-            self.current_frame.destroy()  # remove old frame
-        self.current_frame = EnterHighScoreScreen(self, self.score)
+        self.leave_current_frame()
+        self.current_frame = EnterHighScoreScreen(self,
+                                                  self.score,
+                                                  replay_data)
+        self.current_frame.grid(row=0, column=0, sticky="nsew")
+
+    def show_replay(self, game_replay):
+        """Watch a saved game being played back.
+        game_replay is a replay.Replay
+        """
+        self.difficulty = game_replay.difficulty
+        self.leave_current_frame()
+        self.current_frame = ReplayGame(self, game_replay)
         self.current_frame.grid(row=0, column=0, sticky="nsew")
 
 
+class WidgetGuessGrid:
+    """The previous guesses, as a Label for each hint and an Entry for
+        each digit, laid out in the game layout's grid.
+        Widgets in a grid can't be moved down as a block, so each guess
+        compares every row (only writing the cells that change), use
+        CanvasGuessGrid where that matters.
+    """
+    def __init__(self, layout, rows):
+        """layout is the MainGameLayout to put the widgets in
+            rows is how many guesses to show
+        """
+        # initialize the grid array
+        self.guessGridStructure = []  # This is the guess grid as a whole
+        # guessLineStructure = [] - This is just one line of the grid
+        # (here for clarity).
+        # For each guess line there's an indicator row (up or down),
+        # and a row below that contains the guess
+        # We store 2 parts for each guess - The first is the errorMargin
+        # for each colour pair (3 values), then the 2 associated digits
+        # for each colour (ie 6 values).
+        for i in range(rows):
+            guessLineStructure = []
+            # error margin up/down indicators
+            for j in range(3):
+                labelElement = tk.Label(layout, text="")
+                labelElement.grid(row=(2*i)+4,
+                                  column=(2*j)+1,
+                                  columnspan=2,
+                                  padx=5,
+                                  pady=2,
+                                  sticky='ew')
+                guessLineStructure.append(labelElement)
+            # the colour guesses
+            for j in range(HEX_LENGTH):
+                entryText = tk.StringVar()
+                entryText.set("")
+                # Create the Entry widget
+                guessElement = tk.Entry(layout,
+                                        textvariable=entryText,
+                                        state="disabled",
+                                        width=2,
+                                        font=(FONT, 25),
+                                        justify='center')
+                guessElement.grid(row=(2*i)+5,
+                                  column=j+1,
+                                  padx=5,
+                                  pady=2,
+                                  sticky='ew')
+                # We don't need to save the reference to the actual
+                # Entry, only to the reference of the entryText
+                guessLineStructure.append(entryText)
+            self.guessGridStructure.append(guessLineStructure)
+        # The guesses being shown, newest first. The oldest drops off
+        # the end by itself once every row is in use.
+        self.history = collections.deque(maxlen=rows)
+        # What each cell is showing right now, so only the cells that
+        # change are written to (writing to Tk is the slow part, and
+        # guesses close to the answer share most of their digits)
+        self.shown = [[""] * (3 + HEX_LENGTH) for _ in range(rows)]
+
+    def add_guess(self, symbols, digits):
+        """Show a new guess at the top, moving the others down
+            symbols is the up/down indicator for each colour pair
+            digits is each hex digit of the guess
+        """
+        self.history.appendleft(list(symbols) + list(digits))
+        for i, guess_line_values in enumerate(self.history):
+            self.show_row(i, guess_line_values)
+
+    def show_row(self, row, guess_line_values):
+        """Show the hints and digits of a guess on one line, only
+            changing the cells that are different
+            row is which line to show it on (0 is the top)
+        """
+        guessLineStructure = self.guessGridStructure[row]
+        shown_line = self.shown[row]
+        for j, value in enumerate(guess_line_values):
+            if shown_line[j] == value:
+                continue
+            shown_line[j] = value
+            if j < 3:  # up/down indicators
+                guessLineStructure[j]['text'] = value
+            else:
+                guessLineStructure[j].set(value)
+
+    def clear(self):
+        """Remove every guess"""
+        blank_line = [""] * (3 + HEX_LENGTH)
+        for i in range(len(self.history)):
+            self.show_row(i, blank_line)
+        self.history.clear()
+
+
+class CanvasGuessGrid:
+    """The previous guesses, all drawn on one Canvas.
+        Each hint and digit is a text item (each digit on a rectangle,
+        so it looks like an Entry), and there's a swatch of the colour
+        at the end of each guess. Showing a guess just changes the items
+        with itemconfig, no widgets are made or laid out again.
+        The rows are a ring: a new guess moves every row down one (a
+        single move of the "guess" tag) and reuses the row that went off
+        the bottom for itself at the top, so only its items change.
+    """
+    def __init__(self, layout, rows):
+        """layout is the MainGameLayout to put the canvas in
+            rows is how many guesses to show
+        """
+        row_height = GUESS_HINT_HEIGHT + GUESS_DIGIT_HEIGHT
+        self.row_height = row_height
+        # The digits take up the left of the canvas, and the swatches
+        # are centred in what's left over on the right
+        digits_width = GUESS_CELL_WIDTH * HEX_LENGTH
+        swatch_x = (digits_width + CANVAS_WIDTH - GUESS_SWATCH_SIZE) / 2
+        self.canvas = tk.Canvas(layout,
+                                width=CANVAS_WIDTH,
+                                height=row_height * rows,
+                                bg="white",
+                                highlightthickness=0)
+        # Where the widget grid would be, under the entry boxes
+        self.canvas.grid(row=4,
+                         column=1,
+                         rowspan=2 * rows,
+                         columnspan=HEX_LENGTH,
+                         padx=5,
+                         pady=2,
+                         sticky='w')
+        # For each guess: [the 3 hint items, the 6 digit items, the
+        # swatch item]. Every item in a row also has the row's own tag.
+        self.rows = []
+        # Which of self.rows is at the top, the rest follow it in order
+        self.top = 0
+        # How many rows have a guess in them
+        self.used = 0
+        for i in range(rows):
+            top = i * row_height
+            digits_top = top + GUESS_HINT_HEIGHT
+            tags = ("guess", f"row{i}")
+            # error margin up/down indicators, centred over each pair
+            hint_items = [self.canvas.create_text(
+                (2 * j + 1) * GUESS_CELL_WIDTH,
+                top + GUESS_HINT_HEIGHT / 2,
+                text="",
+                font=(FONT, 12),
+                fill="black",
+                tags=tags) for j in range(3)]
+            # the colour guesses
+            digit_items = []
+            for j in range(HEX_LENGTH):
+                # The boxes are the same on every row, so they stay
+                # where they are when the rows move
+                self.canvas.create_rectangle(
+                    j * GUESS_CELL_WIDTH + 4, digits_top + 2,
+                    (j + 1) * GUESS_CELL_WIDTH - 4,
+                    digits_top + GUESS_DIGIT_HEIGHT - 2,
+                    fill=GUESS_CELL_COLOUR,
+                    outline="#cccccc")
+                digit_items.append(self.canvas.create_text(
+                    (j + 0.5) * GUESS_CELL_WIDTH,
+                    digits_top + GUESS_DIGIT_HEIGHT / 2,
+                    text="",
+                    font=(FONT, 25),
+                    fill="black",
+                    tags=tags))
+            # the guessed colour, hidden until there's a guess
+            swatch_y = digits_top + (GUESS_DIGIT_HEIGHT
+                                     - GUESS_SWATCH_SIZE) / 2
+            swatch_item = self.canvas.create_rectangle(
+                swatch_x, swatch_y,
+                swatch_x + GUESS_SWATCH_SIZE, swatch_y + GUESS_SWATCH_SIZE,
+                fill=EMPTY_BOX_COLOUR,
+                outline="black",
+                state="hidden",
+                tags=tags)
+            self.rows.append((hint_items, digit_items, swatch_item))
+
+    def add_guess(self, symbols, digits):
+        """Show a new guess at the top, moving the others down
+            symbols is the up/down indicator for each colour pair
+            digits is each hex digit of the guess
+        """
+        # The bottom row goes round to the top
+        bottom = (self.top - 1) % len(self.rows)
+        self.canvas.move("guess", 0, self.row_height)
+        self.canvas.move(f"row{bottom}",
+                         0,
+                         -self.row_height * len(self.rows))
+        self.top = bottom
+        self.used = min(self.used + 1, len(self.rows))
+        self.fill_row(self.rows[bottom], symbols, digits)
+
+    def fill_row(self, row_items, symbols, digits):
+        """Show a guess on one row
+            row_items is the row's (hint items, digit items, swatch item)
+        """
+        hint_items, digit_items, swatch_item = row_items
+        for item, symbol in zip(hint_items, symbols):
+            self.canvas.itemconfig(item, text=symbol)
+        for item, digit in zip(digit_items, digits):
+            self.canvas.itemconfig(item, text=digit)
+        self.canvas.itemconfig(swatch_item,
+                               fill="#" + "".join(digits),
+                               state="normal")
+
+    def blank_row(self, row_items):
+        """Remove the guess from one row
+            row_items is the row's (hint items, digit items, swatch item)
+        """
+        hint_items, digit_items, swatch_item = row_items
+        for item in hint_items + digit_items:
+            self.canvas.itemconfig(item, text="")
+        self.canvas.itemconfig(swatch_item, state="hidden")
+
+    def clear(self):
+        """Remove every guess"""
+        for i in range(self.used):
+            self.blank_row(self.rows[(self.top + i) % len(self.rows)])
+        self.used = 0
+
+
+class ScrollingGuessGrid(CanvasGuessGrid):
+    """The previous guesses for a game with no limit on guesses
+        (Practice), with a scroll bar to look back through them.
+        Only the rows that fit on screen are drawn: scrolling fills the
+        same rows in again with older guesses, so however many guesses
+        are made there are never any more canvas items. Only the newest
+        PRACTICE_HISTORY_LIMIT guesses are kept (as their hints and
+        digits) to scroll back through, so the history stays the same
+        size however long the game goes on.
+    """
+    def __init__(self, layout, rows):
+        """layout is the MainGameLayout to put the canvas in
+            rows is how many guesses to show at once
+        """
+        super().__init__(layout, rows)
+        # The newest guesses, oldest first, as (symbols, digits)
+        self.history = collections.deque(
+            maxlen=max(rows, PRACTICE_HISTORY_LIMIT))
+        # How many of the newest guesses have been scrolled past, so 0
+        # is showing the newest at the top
+        self.first = 0
+        self.scrollbar = tk.Scrollbar(layout,
+                                      orient="vertical",
+                                      command=self.scroll)
+        self.scrollbar.grid(row=4,
+                            column=HEX_LENGTH + 1,
+                            rowspan=2 * rows,
+                            pady=2,
+                            sticky='ns')
+        # The mouse wheel is <MouseWheel> on Windows and macOS, and
+        # buttons 4 and 5 on Linux
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.bind(sequence, self.scroll_wheel)
+        self.update_scrollbar()
+
+    def add_guess(self, symbols, digits):
+        """Show a new guess at the top, moving the others down
+            symbols is the up/down indicator for each colour pair
+            digits is each hex digit of the guess
+        """
+        self.history.append((tuple(symbols), "".join(digits)))
+        if self.first == 0:
+            # Showing the newest guesses, so move the rows down
+            super().add_guess(symbols, digits)
+        else:
+            # Scrolled back, so keep showing the same guesses
+            self.first += 1
+            if self.first > len(self.history) - len(self.rows):
+                # Unless the oldest of them have been dropped from the
+                # history, then show the oldest ones left
+                self.first = len(self.history) - len(self.rows)
+                self.fill_rows()
+        self.update_scrollbar()
+
+    def clear(self):
+        """Remove every guess"""
+        super().clear()
+        self.history.clear()
+        self.first = 0
+        self.update_scrollbar()
+
+    def scroll(self, action, amount, unit=None):
+        """Called by the scroll bar
+            action is "moveto", with amount the fraction of the way
+             down to go, or "scroll", with amount the number of units
+             (rows) or pages to move
+        """
+        if action == "moveto":
+            first = round(float(amount) * len(self.history))
+        elif unit == "pages":
+            first = self.first + int(amount) * len(self.rows)
+        else:
+            first = self.first + int(amount)
+        self.scroll_to(first)
+
+    def scroll_wheel(self, event):
+        """Scroll one row for each turn of the mouse wheel"""
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.first - 1)
+        else:
+            self.scroll_to(self.first + 1)
+
+    def scroll_to(self, first):
+        """Show the guesses starting first from the newest
+            first is how many of the newest guesses to scroll past
+        """
+        first = max(0, min(first, len(self.history) - len(self.rows)))
+        if first == self.first:
+            return
+        self.first = first
+        self.fill_rows()
+        self.update_scrollbar()
+
+    def fill_rows(self):
+        """Fill the rows on screen in again, from the top, with the
+            guesses starting self.first from the newest
+        """
+        first = self.first
+        self.used = 0
+        for i in range(len(self.rows)):
+            row_items = self.rows[(self.top + i) % len(self.rows)]
+            index = len(self.history) - 1 - first - i
+            if index >= 0:
+                self.fill_row(row_items, *self.history[index])
+                self.used = i + 1
+            else:
+                self.blank_row(row_items)
+
+    def update_scrollbar(self):
+        """Move the scroll bar to match the guesses being shown"""
+        total = len(self.history)
+        if total <= len(self.rows):
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.first / total,
+                               (self.first + len(self.rows)) / total)
+
+
 class MainGameLayout(tk.Frame):
     """This contains the layout for the PlayGame screen.
     It separates the logic from the layout.
@@ -218,10 +749,11 @@ class MainGameLayout(tk.Frame):
         y1 = ((CANVAS_HEIGHT - COLOUR_BOX_HEIGHT) / 2)+10
         x2 = x1 + COLOUR_BOX_WIDTH
         y2 = y1 + COLOUR_BOX_HEIGHT
-        self.targetBox = self.colour_canvas.create_rectangle(x1, y1, x2, y2,
-                                                             fill="#888888",
-                                                             outline="",
-                                                             width=0)
+        self.targetBox = self.colour_canvas.create_rectangle(
+            x1, y1, x2, y2,
+            fill=EMPTY_BOX_COLOUR,
+            outline="",
+            width=0)
         # Add centered text above the target box
         text_x = x1 + COLOUR_BOX_WIDTH / 2
         text_y = y1 - 15  # Place text slightly above the box's top edge
@@ -243,10 +775,11 @@ class MainGameLayout(tk.Frame):
         y1 = ((CANVAS_HEIGHT - COLOUR_BOX_HEIGHT) / 2) + 10
         x2 = x1 + COLOUR_BOX_WIDTH
         y2 = y1 + COLOUR_BOX_HEIGHT
-        self.guessBox = self.colour_canvas.create_rectangle(x1, y1, x2, y2,
-                                                            fill="#888888",
-                                                            outline="",
-                                                            width=0)
+        self.guessBox = self.colour_canvas.create_rectangle(
+            x1, y1, x2, y2,
+            fill=EMPTY_BOX_COLOUR,
+            outline="",
+            width=0)
         # Add centered text above the guess box
         text_x = x1 + COLOUR_BOX_WIDTH / 2
         text_y = y1 - 15  # Place text slightly above the box's top edge
@@ -260,50 +793,23 @@ class MainGameLayout(tk.Frame):
     def create_guess_grid(self):
         """This is where we display the previous guesses and the hints
             if it's too high or too low
+            GUESS_GRID_RENDERER picks how they are drawn
         """
-        # initialize the grid array
-        self.guessGridStructure = []  # This is the guess grid as a whole
-        # guessLineStructure = [] - This is just one line of the grid
-        # (here for clarity).
-        # For each guess line there's an indicator row (up or down),
-        # and a row below that contains the guess
-        self.guesses = []  # To store references to our Entry widgets
-        self.guess_vars = []  # To store their associated StringVars
-        # We store 2 parts for each guess - The first is the errorMargin
-        # for each colour pair (3 values), then the 2 associated digits
-        # for each colour (ie 6 values).
-        for i in range(MAX_ALLOWED_GUESSES):
-            guessLineStructure = []
-            # error margin up/down indicators
-            for j in range(3):
-                labelElement = tk.Label(self, text="")
-                labelElement.grid(row=(2*i)+4,
-                                  column=(2*j)+1,
-                                  columnspan=2,
-                                  padx=5,
-                                  pady=2,
-                                  sticky='ew')
-                guessLineStructure.append(labelElement)
-            # the colour guesses
-            for j in range(HEX_LENGTH):
-                entryText = tk.StringVar()
-                entryText.set("")
-                # Create the Entry widget
-                guessElement = tk.Entry(self,
-                                        textvariable=entryText,
-                                        state="disabled",
-                                        width=2,
-                                        font=(FONT, 25),
-                                        justify='center')
-                guessElement.grid(row=(2*i)+5,
-                                  column=j+1,
-                                  padx=5,
-                                  pady=2,
-                                  sticky='ew')
-                # We don't need to save the reference to the actual
-                # Entry, only to the reference of the entryText
-                guessLineStructure.append(entryText)
-            self.guessGridStructure.append(guessLineStructure)
+        if max_guesses_for(self.master.difficulty) is None:
+            # There's no limit on the number of guesses, so they can't
+            # all have their own row
+            return ScrollingGuessGrid(self, MAX_ALLOWED_GUESSES)
+        renderers = {"widgets": WidgetGuessGrid,
+                     "canvas": CanvasGuessGrid}
+        return renderers[GUESS_GRID_RENDERER](self, MAX_ALLOWED_GUESSES)
+
+    def reset(self):
+        """Clear everything from the last game, ready for a new one"""
+        for var in self.entry_input_values:
+            var.set("")
+        self.guess_grid.clear()
+        self.colour_canvas.itemconfig(self.targetBox, fill=EMPTY_BOX_COLOUR)
+        self.colour_canvas.itemconfig(self.guessBox, fill=EMPTY_BOX_COLOUR)
 
     def return_to_main_menu(self):
         messagebox_reply = messagebox.askokcancel(
@@ -329,24 +835,9 @@ class MainGameLogic(tk.Frame):
         self.master = master
         self.layout = layout
         self.difficulty = master.difficulty
-        # Get the lowest score in the High Score json for this
-        # difficulty, so we know if, when they have finished, they got a
-        # high score or not.
-        # If they did get a high score they will be directed to enter
-        # their name so it will be added to the high score json
-        self.lowest_score_for_difficulty = \
-            self.get_lowest_score_for_difficulty()
-        self.score = 255  # maximum decimal value of 0xFF
         self.focus = 0
-        self.guess_count = 0
         self.game_ended = False
         self.end_game_choice = 0
-        # This is a list of each submitted guess so far.
-        # It contains the previous guess_line_values.
-        # guess_line_values contains the error margin for each hex
-        # colour pair, then each hex digit the player submitted as a
-        # guess
-        self.list_of_guess_line_values = []
         # register the validation command,
         validate_is_single_character = self.register(self.validate_single_char)
         # We created the entry boxes in the layout, but now we are going
@@ -377,18 +868,40 @@ class MainGameLogic(tk.Frame):
             entry_box.bind("<Return>",
                            lambda event,
                            idx=i: self.submit_entry(event, idx))
+        self.new_round()
+
+    def new_round(self):
+        """Start a game, with a new target colour.
+            On Retry this is called again on the same layout (once it
+            has been reset), rather than building the screen again.
+        """
+        # Get the lowest score in the High Score json for this
+        # difficulty, so we know if, when they have finished, they got a
+        # high score or not.
+        # If they did get a high score they will be directed to enter
+        # their name so it will be added to the high score json
+        # It is read in the background, and is None until it arrives
+        self.lowest_score_for_difficulty = None
+        self.get_lowest_score_for_difficulty()
+        # The engine holds the rules and the state of this game (target,
+        # score, guess count), this class just drives it from the GUI
+        self.engine = GameEngine(
+            self.difficulty,
+            max_guesses=max_guesses_for(self.difficulty))
+        # When the game started, so its length can be recorded
+        self.start_time = time.monotonic()
         # Set initial focus to the first entry
         self.layout.entry_boxes[0].focus_set()
         # Define the colour for the target box
-        # Makes a random colour hex, eg #26e16b
-        self.target_colour = "#%06x" % random.randint(0, 0xFFFFFF)
-        print(self.target_colour)  # Helps with cheating ;)
-        # We get the RGB values from index 1, because index 0 is hash #
-        self.target_red = int(self.target_colour[1:3], 16)
-        self.target_green = int(self.target_colour[3:5], 16)
-        self.target_blue = int(self.target_colour[5:7], 16)
+        # The engine made a random colour hex, eg #26e16b
+        self.target_colour = self.engine.target_colour
         self.update_target_box(self.target_colour)
 
+    @property
+    def accuracy(self):
+        """The player's accuracy so far, as shown in the high scores"""
+        return self.engine.accuracy
+
     def update_guess_box(self, colour):
         """Updates the box with the actual colour of the player's latest
            guess colour is a 6 digit hex value
@@ -475,32 +988,17 @@ class MainGameLogic(tk.Frame):
         # sure each box has a valid entry, then if it has update the
         # grid, check if the game has finished, if it hasn't clear the
         # entry boxes
-        if (not self.validate_entries()):
+        if (not self.validate_entries()) or self.engine.game_over:
             return
         else:
-            self.guess_count += 1
             # If everything is ok combine the boxes and check it against
             # the target colours.
-            guess_red = int(f"{self.layout.entry_boxes[0].get()}" +
-                            f"{self.layout.entry_boxes[1].get()}", 16)
-            guess_green = int(f"{self.layout.entry_boxes[2].get()}" +
-                              f"{self.layout.entry_boxes[3].get()}", 16)
-            guess_blue = int(f"{self.layout.entry_boxes[4].get()}" +
-                             f"{self.layout.entry_boxes[5].get()}", 16)
-            # Calculate the error margins for each colour
-            diff_red = guess_red - self.target_red
-            diff_green = guess_green - self.target_green
-            diff_blue = guess_blue - self.target_blue
-            # Give different "hints" based on difficulty selected
-            if (self.difficulty == DIFFICULTY_STANDARD):
-                error_margin_red = self.error_margin_indicator(diff_red)
-                error_margin_green = self.error_margin_indicator(diff_green)
-                error_margin_blue = self.error_margin_indicator(diff_blue)
-            else:  # DIFFICULTY_EXPERT
-                error_margin_red = self.get_sign(diff_red)
-                error_margin_green = self.get_sign(diff_green)
-                error_margin_blue = self.get_sign(diff_blue)
-            self.update_score(diff_red, diff_green, diff_blue)
+            guessed_digits = ""
+            for digit in self.layout.entry_boxes:
+                guessed_digits = guessed_digits + f"{digit.get()}"
+            result = self.engine.guess(guessed_digits)
+            error_margin_red, error_margin_green, error_margin_blue = \
+                result.margins
             # Move everything in the answer grid down 1, append the
             # latest answer to the grid
             self.update_guess_grid(self.layout.entry_boxes,
@@ -508,29 +1006,20 @@ class MainGameLogic(tk.Frame):
                                    error_margin_green,
                                    error_margin_blue)
             # update their guess colour on the canvas
-            guessed_colour = "#"
-            for digit in self.layout.entry_boxes:
-                guessed_colour = guessed_colour + f"{digit.get()}"
-            self.update_guess_box(guessed_colour)
+            self.update_guess_box("#" + guessed_digits)
             # Are all the entries correct? If so, game over.
             # Put up a congratulations message, does it qualify as a
             # high score, if so, in the congrats message have an entry
             # box to enter your name, then save the high scores back
             game_over = False
-            if diff_red == 0 and diff_green == 0 and diff_blue == 0:
+            # Every finished game goes in the history, high score or not
+            if result.won or result.lost:
+                self.record_game()
+            if result.won:
                 # Player won the game
-                # Did they get a high score?
-                if (self.accuracy > self.lowest_score_for_difficulty):
-                    self.master.master.show_enter_high_score_screen(
-                                                                 self.accuracy)
-                    return
-                messagebox_reply = \
-                    messagebox.askretrycancel(
-                        "Play Again?",
-                        "You won! Do you want to play again?"
-                    )
-                game_over = True
-            elif self.guess_count >= MAX_ALLOWED_GUESSES:
+                self.finish_won_game()
+                return
+            elif result.lost:
                 # Player lost the game
                 messagebox_reply = \
                                 messagebox.askretrycancel(
@@ -540,7 +1029,7 @@ class MainGameLogic(tk.Frame):
                 game_over = True
             if game_over:
                 if messagebox_reply:  # result is True if Retry
-                    self.master.master.show_game(self.difficulty)
+                    self.master.retry()
                 else:
                     self.master.master.show_menu_screen()
                 return
@@ -553,6 +1042,69 @@ class MainGameLogic(tk.Frame):
             self.layout.entry_boxes[0].focus_set()
             self.layout.entry_boxes[0].selection_range(0, tk.END)
 
+    def finish_won_game(self):
+        """The player won, so either go to enter their high score, or
+            ask if they want to play again
+        """
+        # If the lowest high score still hasn't been read, this is called
+        # again when it arrives
+        if self.lowest_score_for_difficulty is None:
+            return
+        # Did they get a high score?
+        if (self.accuracy > self.lowest_score_for_difficulty):
+            import replay
+            self.master.master.show_enter_high_score_screen(
+                self.accuracy,
+                replay.encode_replay(replay.replay_from_engine(self.engine)))
+            return
+        messagebox_reply = messagebox.askretrycancel(
+            "Play Again?",
+            "You won! Do you want to play again?"
+        )
+        if messagebox_reply:  # result is True if Retry
+            self.master.retry()
+        else:
+            self.master.master.show_menu_screen()
+
+    def record_game(self):
+        """Save the finished game to the game history, and its replay
+            to the replay file, in the background. It carries on after
+            the player leaves the screen.
+        """
+        game = self.master.master
+        game.async_loop.spawn(self.save_game_record(
+            game,
+            self.engine,
+            time.monotonic() - self.start_time))
+
+    async def save_game_record(self, game, engine, duration):
+        """Save a finished game (see record_game)
+            game is the HexGame
+            engine is the finished game's GameEngine
+            duration is how long it took, in seconds
+        """
+        import replay
+        try:
+            game_history = await game.open_game_history()
+            await game.async_loop.run_blocking(game_history.record_game,
+                                               engine,
+                                               duration)
+            await game.async_loop.run_blocking(
+                replay.append_replay,
+                REPLAY_FILE,
+                replay.replay_from_engine(engine))
+        except IOError as e:
+            self.show_record_error(e)
+
+    def show_record_error(self, error):
+        """Saving the game to the history failed. It's only used for
+            the statistics, so it's a warning rather than an error
+            error is the exception raised
+        """
+        messagebox.showwarning(
+            "Game Not Recorded",
+            f"This game couldn't be added to your statistics: {error}")
+
     def validate_entries(self):
         """Checks to see if there is an enrty in each box
             (you can't submit an entry only half done!)
@@ -570,132 +1122,63 @@ class MainGameLogic(tk.Frame):
                           error_margin_blue):
         """Adds the submitted guess to the previous guesses but adding
             it in the first position, thus moving every previous guess
-            down
+            down. The guess grid keeps the previous guesses itself, and
+            only updates what changes.
             entry_boxes is a list of references to each guess entry box
             error_margin_red etc is an indicator for how far out the
              guess was (integer)
         """
-        # guess_line_values contains the error margin for each hex
-        # colour pair, then each hex digit the player submitted as a
-        # guess
-        guess_line_values = [error_margin_red,
-                             error_margin_green,
-                             error_margin_blue]
-        for hex_digit in entry_boxes:   # Add each hex digit
-            guess_line_values.append(hex_digit.get())
-        # Insert the latest guess into the first position of the list
-        # that contains the previous guesses
-        self.list_of_guess_line_values.insert(
-            0, guess_line_values)
         # Add in the error margin hints and the guessed hex digits
-        for i in range(min(len(self.list_of_guess_line_values),
-                           MAX_ALLOWED_GUESSES)):
-            guessLineStructure = self.layout.guessGridStructure[i]
+        self.layout.guess_grid.add_guess(
             # up/down indicators
-            for j in range(3):
-                guessLineStructure[j]['text'] = self.error_margin_symbols(
-                    self.list_of_guess_line_values[i][j]
-                )
-            for j in range(HEX_LENGTH):
-                guessLineStructure[j+3].set(
-                    self.list_of_guess_line_values[i][j+3]
-                )
-
-    def error_margin_indicator(self, number):
-        """Calculates the "error" in the player's guess to give a hint
-            as to how far out their guess is. We do this my taking the
-            log of the absolute difference between the guessed value and
-            the target value.
-            This can be adjusted by changing the base log value,
-            contained in ERR_INDICATOR_DIFFICULTY,
-            ie log 2 is easiest , log 3+ will give a wider range.
-            ERR_INDICATOR_DIFFICULTY is the base log value.
-            It should be set as an integer from 2+
-            number is an integer, indicating error
-        """
-        # Calculates the logarithm of the absolute of a number and
-        # rounds it up to the next integer.
-        # If the original number is negative it then returns this value
-        # as a negative.
-        # Need to add 1, since if you are out by 1 then log will return
-        # zero, but the guess is still not quite correct
-        if number == 0:
-            return 0
-        elif number < 0:
-            margin = -math.ceil(math.log(-(number),
-                                         ERR_INDICATOR_DIFFICULTY))-1
-            if margin < -1:
-                margin = margin + 1
-        else:
-            margin = math.ceil(math.log(number, ERR_INDICATOR_DIFFICULTY)) + 1
-            if margin > 1:
-                margin = margin - 1
-        return margin
+            [self.error_margin_symbols(error_margin)
+             for error_margin in (error_margin_red,
+                                  error_margin_green,
+                                  error_margin_blue)],
+            [hex_digit.get() for hex_digit in entry_boxes])
 
     def error_margin_symbols(self, number):
         """ Draws the arrows left or right as a hint to the player how
             far out they are
             number is an integer, indicating error
         """
-        symbol = ""
-        if number == 0:
-            return "O"
-        elif number < 0:
-            for i in range(abs(number)):
-                symbol = symbol + ">"
-        else:
-            for i in range(number):
-                symbol = symbol + "<"
-        return symbol
-
-    def update_score(self,
-                     error_margin_red,
-                     error_margin_green,
-                     error_margin_blue):
-        """The score is not displayed, but is used to determin the high
-            score charts. Most weight is given to the initial guesses,
-            since each subsequent guess is easier.
-            error_margin_xxx is an integer value for actual difference
-             between target and guess
-        """
-        average_error = (abs(error_margin_red) +
-                         abs(error_margin_green) +
-                         abs(error_margin_blue)) / 3
-        self.score = ((255 - average_error)/255) * self.score
-        self.accuracy = round((int(self.score)/255)*100, 2)
-
-    def get_sign(self, value):
-        """ Is the value less than, great than, or equal to zero
-            value is an integer
-        """
-        if value > 0:
-            return 1
-        elif value < 0:
-            return -1
-        else:
-            return 0
+        return gameengine.error_margin_symbols(number, self.engine.log_base)
 
     def get_lowest_score_for_difficulty(self):
         """Find the lowest score for the difficult - used to determine
-            whether a winning game is good enough to make the charts
+            whether a winning game is good enough to make the charts.
+            It is read in the background, by load_lowest_score
         """
-        # If the high score file has an error (eg not found etc) then the
-        # lowest score is zero
-        if not os.path.exists(HIGH_SCORE_FILE):
-            return 0
+        if self.difficulty == DIFFICULTY_PRACTICE:
+            # Practice games don't go on the high score charts, so no
+            # score is good enough
+            self.lowest_score_for_difficulty = float("inf")
+            return
+        self.master.master.async_loop.spawn(self.load_lowest_score(),
+                                            owner=self)
+
+    async def load_lowest_score(self):
+        """Read the lowest score in the background. If the high score
+            file has an error (eg not found etc), the lowest score is
+            zero
+        """
+        game = self.master.master
         try:
-            with open(HIGH_SCORE_FILE, "r") as high_score_file:
-                high_score_data = json.load(high_score_file)
-        except json.JSONDecodeError:
-            return 0
-        except IOError:
-            return 0
-        if self.difficulty not in high_score_data:
-            return 0
-        if len(high_score_data[self.difficulty]) < 3:
-            return 0
-        last_index = len(high_score_data[self.difficulty]) - 1
-        return high_score_data[self.difficulty][last_index]["score"]
+            high_scores = await game.open_high_scores()
+            lowest_score = await game.async_loop.run_blocking(
+                high_scores.lowest_score, self.difficulty)
+        except (IOError, ValueError):
+            lowest_score = 0
+        self.set_lowest_score_for_difficulty(lowest_score)
+
+    def set_lowest_score_for_difficulty(self, lowest_score):
+        """The lowest score has been read.
+            lowest_score is a decimal value
+        """
+        self.lowest_score_for_difficulty = lowest_score
+        # If they already won, carry on now we know
+        if self.engine.won:
+            self.finish_won_game()
 
 
 class PlayGame(tk.Frame):
@@ -716,6 +1199,65 @@ class PlayGame(tk.Frame):
         # Pass the layout to the game logic
         self.logic = MainGameLogic(self, self.layout)
 
+    def retry(self):
+        """Play again at the same difficulty, reusing this screen.
+            Clearing the layout is much quicker than building it again.
+        """
+        self.layout.reset()
+        self.logic.new_round()
+
+
+class ReplayLogic(MainGameLogic):
+    """
+        Plays a saved game back on the game layout, one guess at a time,
+        the same way MainGameLogic shows a guess the player typed in.
+        None of the player's key bindings are set up, so nothing can be
+        typed in.
+    """
+    def __init__(self, master, layout, game_replay):
+        # Not MainGameLogic.__init__, that starts a new game
+        tk.Frame.__init__(self, master, bg="white")
+        self.master = master
+        self.layout = layout
+        self.difficulty = game_replay.difficulty
+        self.replay = game_replay
+        import replay
+        self.engine = replay.engine_for(game_replay)
+        for entry_box in self.layout.entry_boxes:
+            entry_box.config(state="disabled")
+        self.target_colour = self.engine.target_colour
+        self.update_target_box(self.target_colour)
+        if game_replay.guesses:
+            self.after(REPLAY_STEP_MS, self.show_next_guess)
+
+    def show_next_guess(self):
+        """Put the next guess in the entry boxes and play it"""
+        guess_red, guess_green, guess_blue = \
+            self.replay.guesses[self.engine.guess_count]
+        guessed_digits = "%02x%02x%02x" % (
+            guess_red, guess_green, guess_blue)
+        for var, digit in zip(self.layout.entry_input_values,
+                              guessed_digits):
+            var.set(digit)
+        result = self.engine.guess_rgb(guess_red, guess_green, guess_blue)
+        self.update_guess_grid(self.layout.entry_boxes, *result.margins)
+        self.update_guess_box("#" + guessed_digits)
+        if self.engine.guess_count < len(self.replay.guesses):
+            self.after(REPLAY_STEP_MS, self.show_next_guess)
+
+
+class ReplayGame(tk.Frame):
+    """Watch a saved game, on the same layout as PlayGame"""
+    def __init__(self, master, game_replay):
+        super().__init__(master, bg="white")
+        self.master = master
+        self.difficulty = game_replay.difficulty
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.layout = MainGameLayout(self)
+        self.layout.grid(row=0, column=0, sticky="nsew")
+        self.logic = ReplayLogic(self, self.layout, game_replay)
+
 
 class HelpScreen(tk.Frame):
     """Display text file containing the help
@@ -724,6 +1266,9 @@ class HelpScreen(tk.Frame):
         We display more complex help text as html in the browser
         (since it's not possible using TKinter)
     """
+    # Kept once built, so help.txt is only read once (see switch_frame)
+    keep_alive = True
+
     def __init__(self, master):
         super().__init__(master, bg="white")
         self.master = master  # reference to the main application
@@ -745,6 +1290,7 @@ class HelpScreen(tk.Frame):
         back_button.grid(
             row=4, column=0, pady=(10, 20), sticky="n"
         )
+        from tkinter import scrolledtext
         self.text_area = scrolledtext.ScrolledText(
             self,
             wrap=tk.WORD,
@@ -846,6 +1392,7 @@ class HelpScreen(tk.Frame):
                 " Please ensure it's in the same directory as this app."
             )
             return
+        import webbrowser
         try:
             # Use 'file:///' prefix for local files
             webbrowser.open(f"file:///{html_file_path}")
@@ -860,6 +1407,10 @@ class HelpScreen(tk.Frame):
 
 class HighScoreScreen(tk.Frame):
     """Display the high scores"""
+    # Kept once built, and the scores are read again each time it is
+    # shown (see switch_frame)
+    keep_alive = True
+
     def __init__(self, master):
         super().__init__(master, bg="white")
         self.master = master  # reference to the main application
@@ -883,29 +1434,67 @@ class HighScoreScreen(tk.Frame):
         self.load_and_display_scores()
 
     def load_and_display_scores(self):
-        """Reads the JSON High Score file and updates the GUI with the
-           score data.
+        """Reads the High Score file in the background, showing a
+           placeholder until the score data arrives.
+        """
+        self.loading_label = tk.Label(self.scores_frame,
+                                      text="Loading scores...",
+                                      font=(FONT, 18),
+                                      bg="white")
+        self.loading_label.grid(row=0, column=0, columnspan=2, pady=20)
+        self.load_task = self.master.async_loop.spawn(self.load_scores(),
+                                                      owner=self)
+
+    def refresh(self):
+        """Shown again, so read the scores again, in case they have
+            changed
+        """
+        self.load_task.cancel()
+        for widget in self.scores_frame.winfo_children():
+            widget.destroy()
+        self.load_and_display_scores()
+
+    async def load_scores(self):
+        """Read the High Score file in the background, then show it"""
+        try:
+            high_scores = await self.master.open_high_scores()
+            high_score_data = await self.master.async_loop.run_blocking(
+                high_scores.all_scores)
+        # Every store raises ScoreStoreError (an IOError), and
+        # json.JSONDecodeError is a ValueError, as is a bad name or
+        # score in some stores' files
+        except (IOError, ValueError) as e:
+            self.show_load_error(e)
+        else:
+            self.display_scores(high_score_data)
+
+    def show_load_error(self, error):
+        """Reading the High Score file failed
+            error is the exception raised
         """
-        if not os.path.exists(HIGH_SCORE_FILE):
+        import json
+        self.loading_label.destroy()
+        # A lot can go wrong, (file moved etc)
+        if isinstance(error, FileNotFoundError):
             messagebox.showerror(
                 "High Score File Not Found",
                 f"The file '{HIGH_SCORE_FILE}' does not exist."
             )
-            return
-        # We use try because a lot can go wrong, (file moved etc)
-        try:
-            with open(HIGH_SCORE_FILE, "r") as high_score_file:
-                high_score_data = json.load(high_score_file)
-        except json.JSONDecodeError:
+        elif isinstance(error, json.JSONDecodeError):
             messagebox.showerror("JSON Error",
                                  "Could not decode High Score JSON from file.")
-            return
-        except IOError as e:
+        else:
             messagebox.showerror(
                 "File Error",
-                f"An error occurred while reading the High Score file: {e}"
+                f"An error occurred while reading the High Score file:"
+                f" {error}"
             )
-            return
+
+    def display_scores(self, high_score_data):
+        """Updates the GUI with the score data.
+            high_score_data is a dict of difficulty: list of scores
+        """
+        self.loading_label.destroy()
         # Start grid layout from the top
         row_counter = 1
         for difficulty, players in high_score_data.items():
@@ -962,8 +1551,139 @@ class HighScoreScreen(tk.Frame):
                 row_counter += 1
 
 
+class StatsScreen(tk.Frame):
+    """Display the statistics from the game history"""
+    # Kept once built, and the statistics are read again each time it is
+    # shown (see switch_frame)
+    keep_alive = True
+
+    def __init__(self, master):
+        super().__init__(master, bg="white")
+        self.master = master  # reference to the main application
+        self.grid_rowconfigure(0, weight=0)
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        back_button = tk.Button(self, text="Back",
+                                font=(FONT, 14),
+                                bg=DEFAULT_BUTTON_COLOUR,
+                                fg="black",
+                                activebackground=DEFAULT_ACTIVE_BUTTON_COLOUR,
+                                activeforeground="white",
+                                width=15, relief="raised",
+                                bd=2,
+                                command=self.master.show_menu_screen)
+        back_button.grid(row=4, column=0, pady=(10, 20), sticky="n")
+        stats_frame = tk.Frame(self, bg="white")
+        stats_frame.grid(row=1, column=0, pady=20)
+        # Each period gets its own frame, filled in when its totals
+        # have been read in the background
+        self.period_frames = []
+        for row, title in enumerate(("This Week", "All Time")):
+            period_frame = tk.Frame(stats_frame, bg="white")
+            period_frame.grid(row=row, column=0, pady=10)
+            title_label = tk.Label(period_frame,
+                                   text=title,
+                                   font=(FONT, 26, "bold"),
+                                   bg="white")
+            title_label.grid(row=0, column=0, columnspan=4, pady=(15, 5))
+            self.period_frames.append((period_frame, title_label))
+        self.load_tasks = []
+        self.refresh()
+
+    def refresh(self):
+        """Read the statistics (again, if the screen is being shown
+            again, in case more games have been played)
+        """
+        for task in self.load_tasks:
+            task.cancel()
+        self.load_tasks = []
+        from gamehistory import week_start
+        # "This Week" moves on every day
+        for (period_frame, title_label), since_day in zip(
+                self.period_frames, (week_start(), None)):
+            # Clear everything but the title
+            for widget in period_frame.winfo_children():
+                if widget is not title_label:
+                    widget.destroy()
+            loading_label = tk.Label(period_frame,
+                                     text="Loading statistics...",
+                                     font=(FONT, 14),
+                                     bg="white")
+            loading_label.grid(row=1, column=0, columnspan=4, pady=5)
+            self.load_tasks.append(self.master.async_loop.spawn(
+                self.load_stats(period_frame, since_day),
+                owner=self))
+
+    async def load_stats(self, period_frame, since_day):
+        """Read one period's statistics in the background, then show
+            them
+            period_frame is the frame to show them in
+            since_day is the first day of the period (see
+             GameHistory.summary)
+        """
+        try:
+            game_history = await self.master.open_game_history()
+            summary = await self.master.async_loop.run_blocking(
+                game_history.summary, since_day)
+        except IOError as e:
+            self.show_load_error(e)
+        else:
+            self.display_stats(period_frame, summary)
+
+    def show_load_error(self, error):
+        """Reading the game history failed
+            error is the exception raised
+        """
+        messagebox.showerror(
+            "File Error",
+            f"An error occurred while reading the game history: {error}"
+        )
+
+    def display_stats(self, period_frame, summary):
+        """Show the statistics for one period
+            period_frame is the frame to show them in
+            summary is a dict of difficulty: statistics, as given by
+             GameHistory.summary
+        """
+        # Replace the loading label with the table
+        for widget in period_frame.grid_slaves(row=1):
+            widget.destroy()
+        if not summary:
+            no_games_label = tk.Label(period_frame,
+                                      text="No games played yet",
+                                      font=(FONT, 14),
+                                      bg="white")
+            no_games_label.grid(row=1, column=0, columnspan=4, pady=5)
+            return
+        headings = ("Difficulty", "Games", "Won", "Guesses")
+        for column, heading in enumerate(headings):
+            heading_label = tk.Label(period_frame,
+                                     text=heading,
+                                     font=(FONT, 14, "bold"),
+                                     bg="white")
+            heading_label.grid(row=1, column=column, padx=8, pady=2)
+        for row, (difficulty, stats) in enumerate(summary.items(), 2):
+            # Guesses is the average number it took to win
+            mean_guesses = stats["mean_guesses"]
+            values = (difficulty,
+                      stats["games"],
+                      f"{stats['win_rate']:.0f}%",
+                      "-" if mean_guesses is None else f"{mean_guesses:.1f}")
+            for column, value in enumerate(values):
+                value_label = tk.Label(period_frame,
+                                       text=value,
+                                       font=(FONT, 14),
+                                       bg="white")
+                value_label.grid(row=row, column=column, padx=8, pady=2)
+
+
 class MenuScreen(tk.Frame):
     """initial screen with option for new game"""
+    # Kept once built, so the logo is only loaded once (see switch_frame)
+    # It's the first screen, so the logo is only loaded once the window
+    # has appeared (see load_logo)
+    keep_alive = True
+
     def __init__(self, master):
         super().__init__(master, bg="white")
         self.master = master  # reference to the main application
@@ -973,12 +1693,13 @@ class MenuScreen(tk.Frame):
         self.grid_rowconfigure(2, weight=0)  # for buttons
         self.grid_rowconfigure(3, weight=1)
         self.grid_columnconfigure(0, weight=1)
-        # title Label
-        self.photo = tk.PhotoImage(file="hexaguessa.png")
-        # resize to 1/4 of original image size
-        self.photo = self.photo.subsample(4)
-        title_label = tk.Label(self, image=self.photo, bg="white")
-        title_label.grid(row=0, column=0, pady=(10, 20), sticky="ns")
+        # title Label, with the title as text until the logo is loaded
+        self.title_label = tk.Label(self,
+                                    text="Hex-a-Guess-a",
+                                    font=(FONT, 30),
+                                    bg="white")
+        self.title_label.grid(row=0, column=0, pady=(10, 20), sticky="ns")
+        self.master.after_first_paint(self.load_logo)
         new_game_button = tk.Button(
             self,
             text="New Game",
@@ -1009,6 +1730,21 @@ class MenuScreen(tk.Frame):
             command=self.master.show_high_score_screen
         )
         highscores_button.grid(row=2, column=0, pady=10, sticky="n")
+        stats_button = tk.Button(
+            self,
+            text="Statistics",
+            font=(FONT, 20),
+            bg="plum3",
+            fg="black",
+            activebackground="plum4",
+            activeforeground="white",
+            width=12,
+            height=1,
+            relief="raised",
+            bd=4,
+            command=self.master.show_stats_screen
+        )
+        stats_button.grid(row=3, column=0, pady=10, sticky="n")
         help_button = tk.Button(
             self,
             text="Help",
@@ -1023,7 +1759,7 @@ class MenuScreen(tk.Frame):
             bd=4,
             command=self.master.show_help_screen
         )
-        help_button.grid(row=3, column=0, pady=10, sticky="n")
+        help_button.grid(row=4, column=0, pady=10, sticky="n")
         exit_game_button = tk.Button(
             self,
             text="Exit",
@@ -1038,18 +1774,31 @@ class MenuScreen(tk.Frame):
             bd=4,
             command=self.master.exit_game
         )
-        exit_game_button.grid(row=4, column=0, pady=10, sticky="n")
+        exit_game_button.grid(row=5, column=0, pady=10, sticky="n")
+
+    def load_logo(self):
+        """Show the logo in the title. Decoding it is the slowest part of
+            starting up, so it's left until the window is showing.
+        """
+        self.photo = tk.PhotoImage(file=LOGO_IMAGE)
+        # resize to 1/4 of original image size
+        self.photo = self.photo.subsample(4)
+        self.title_label.config(image=self.photo)
 
 
 class NewGameScreen(tk.Frame):
     """for entering difficulty"""
+    # Nothing on it changes, so it is kept once built (see switch_frame)
+    keep_alive = True
+
     def __init__(self, master):
         super().__init__(master, bg="white")
         self.master = master
         self.grid_rowconfigure(0, weight=1)
         self.grid_rowconfigure(3, weight=0)  # difficulty buttons
-        self.grid_rowconfigure(4, weight=0)  # back button
-        self.grid_rowconfigure(5, weight=1)
+        self.grid_rowconfigure(4, weight=0)  # practice button
+        self.grid_rowconfigure(5, weight=0)  # back button
+        self.grid_rowconfigure(6, weight=1)
         self.grid_columnconfigure(0, weight=1)
         # frame to hold difficulty buttons for better layout
         difficulty_buttons_frame = tk.Frame(self, bg="white")
@@ -1084,6 +1833,22 @@ class NewGameScreen(tk.Frame):
             command=lambda: self.master.show_game(DIFFICULTY_EXPERT)
         )
         expert_button.pack(side=tk.LEFT, padx=10)
+        # Practice has no limit on guesses, and no high scores
+        practice_button = tk.Button(
+            self,
+            text=DIFFICULTY_PRACTICE,
+            font=(FONT, 16),
+            bg=DEFAULT_BUTTON_COLOUR,
+            fg="black",
+            activebackground=DEFAULT_ACTIVE_BUTTON_COLOUR,
+            activeforeground="white",
+            width=10,
+            height=1,
+            relief="raised",
+            bd=3,
+            command=lambda: self.master.show_game(DIFFICULTY_PRACTICE)
+        )
+        practice_button.grid(row=4, column=0, pady=(0, 20))
         back_button = tk.Button(self,
                                 text="Back",
                                 font=(FONT, 14),
@@ -1095,7 +1860,7 @@ class NewGameScreen(tk.Frame):
                                 relief="raised",
                                 bd=2,
                                 command=self.master.show_menu_screen)
-        back_button.grid(row=4, column=0, pady=(10, 20), sticky="n")
+        back_button.grid(row=5, column=0, pady=(10, 20), sticky="n")
 
 
 class EnterHighScoreScreen(tk.Frame):
@@ -1103,11 +1868,12 @@ class EnterHighScoreScreen(tk.Frame):
         This screen is ONLY entered from PlayGame, the player CANNOT
         navigate here
     """
-    def __init__(self, master, new_score):
+    def __init__(self, master, new_score, replay_data):
         super().__init__(master, bg="white")
         self.master = master  # reference to the main application
         self.difficulty = master.difficulty
         self.new_score = new_score
+        self.replay_data = replay_data
         # to center everything
         central_frame = tk.Frame(self, bg="white")
         central_frame.pack(expand=True, padx=20, pady=20)
@@ -1163,49 +1929,68 @@ class EnterHighScoreScreen(tk.Frame):
         )
         submit_button.grid(row=5, column=0, pady=(20, 0), sticky="n")
 
-    def read_scores(self, high_score_filename):
-        """Load scores from the high score JSON file
-            high_score_filename is text, preferably from constants
+    def update_scores(self):
+        """Add the new player's score to the high scores, once it has
+            been checked against the game's replay (see verify.py).
+            It is saved in the background, before the high score screen
+            reads the scores back, since the jobs run in order
         """
+        import verify
+        submission = verify.Submission(self.difficulty,
+                                       self.player_name_text.get(),
+                                       self.new_score,
+                                       self.replay_data)
+        # Not owned by this screen, since it is left straight away
+        self.master.async_loop.spawn(self.save_score(submission))
+        self.master.show_high_score_screen()
+
+    async def save_score(self, submission):
+        """Save the score in the background
+            submission is a verify.Submission
+        """
+        async_loop = self.master.async_loop
         try:
-            with open(high_score_filename, 'r') as high_score_file:
-                return json.load(high_score_file)
-        except FileNotFoundError:
-            # If the file doesn't exist, return a default structure.
-            return {
-                DIFFICULTY_STANDARD: [],
-                DIFFICULTY_EXPERT: []
-            }
-        except json.JSONDecodeError:
-            return {
-                DIFFICULTY_STANDARD: [],
-                DIFFICULTY_EXPERT: []
-            }
+            outbox = await self.master.open_outbox()
+            if outbox is not None:
+                # Going to a score server, which checks it itself. It
+                # is saved to the outbox straight away and sent when
+                # possible
+                await async_loop.run_blocking(outbox.add,
+                                              submission,
+                                              OUTBOX_WAIT)
+                return
+            import verify
+            high_scores = await self.master.open_high_scores()
+            passed = await async_loop.run_blocking(
+                verify.add_verified_scores,
+                high_scores,
+                [submission])
+        # The same errors as reading the scores (see
+        # HighScoreScreen.load_scores)
+        except (IOError, ValueError) as e:
+            self.show_save_error(e)
+        else:
+            self.check_verified(passed)
 
-    def update_scores(self):
-        """Update the JSON file with new player's data."""
-        all_scores = self.read_scores(HIGH_SCORE_FILE)
-        # Create a dictionary for the new score entry
-        new_score_entry = {
-            'player_name': self.player_name_text.get(),
-            'score': self.new_score
-        }
-        # Check if the difficulty level exists in the list of levels
-        if self.difficulty not in all_scores:
-            all_scores[self.difficulty] = [new_score_entry]
-        else:  # The difficult exists so we append out score
-            all_scores[self.difficulty].append(new_score_entry)
-            # Sort the scores list (for this difficulty) by score
-            all_scores[self.difficulty] = sorted(
-                all_scores[self.difficulty],
-                reverse=True, key=lambda x: x['score']
+    def check_verified(self, passed):
+        """Tell the player if their score was turned away
+            passed is a list with True if the score was checked and
+             saved
+        """
+        if not passed[0]:
+            messagebox.showerror(
+                "Score Not Saved",
+                "Your score did not match your game, so it was not saved."
             )
-            # Keep all but 3 scores for this difficulty
-            all_scores[self.difficulty] = all_scores[self.difficulty][:3]
-            # Save back to JSON file
-        with open(HIGH_SCORE_FILE, 'w') as file:
-            json.dump(all_scores, file, indent=4)
-        self.master.show_high_score_screen()
+
+    def show_save_error(self, error):
+        """Saving the score failed
+            error is the exception raised
+        """
+        messagebox.showerror(
+            "File Error",
+            f"An error occurred while saving the High Score file: {error}"
+        )
 
     def validate_player_name(self, player_name):
         # Check if the player_name contains only alphabetic characters
@@ -1227,5 +2012,27 @@ class EnterHighScoreScreen(tk.Frame):
 
 # run game
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Play Hex-a-Guess-a")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="watch a game from a replay file instead")
+    parser.add_argument("--game", type=int, default=-1,
+                        help="which game in the replay file to watch"
+                             " (default: the last one)")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="print how long the window took to appear,"
+                             " then close")
+    args = parser.parse_args()
     app = HexGame()
+    if args.replay:
+        import replay
+        app.show_replay(replay.read_replays(args.replay)[args.game])
+    if args.startup_time:
+        def report_startup_time():
+            """Print the time to first paint and close"""
+            milliseconds = app.first_paint_time * 1000
+            print(f"First paint after {milliseconds:.0f}ms (target"
+                  f" {FIRST_PAINT_TARGET_MS}ms)")
+            app.exit_game()
+        app.after_first_paint(report_startup_time)
     app.mainloop()
@@ -0,0 +1,97 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: Crash safe file writes and locking between processes
+# ======================================
+"""Helpers for files that several copies of the game share.
+
+atomic_write_json writes to a temporary file next to the real one,
+flushes it to disk and then renames it over the real one, so anyone
+reading the file sees either the old scores or the new ones, never half
+a file, even if the game crashes part way through.
+
+file_lock takes an advisory lock (fcntl) on a ".lock" file next to the
+real one, so only one process updates it at a time. fcntl only exists
+on Unix, elsewhere the lock does nothing.
+"""
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+"""Constants."""
+
+# Added to a file's name to get the name of its lock file
+LOCK_SUFFIX = ".lock"
+
+
+def fsync_directory(directory):
+    """Make sure a rename in a directory has reached the disk.
+        Only possible (and needed) on Unix.
+    """
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    directory_fd = os.open(directory or ".", os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)
+
+
+def atomic_write_bytes(filename, data):
+    """Replace a file's contents in one go
+        filename is text, preferably from constants
+        data is bytes
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    temp_fd, temp_filename = tempfile.mkstemp(
+        dir=directory, prefix=os.path.basename(filename) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(temp_fd, "wb") as temp_file:
+            # mkstemp makes the file private, keep the original's
+            # permissions
+            if os.path.exists(filename):
+                os.chmod(temp_filename, os.stat(filename).st_mode & 0o777)
+            temp_file.write(data)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_filename, filename)
+    except BaseException:
+        # Don't leave half written temporary files lying around
+        try:
+            os.remove(temp_filename)
+        except OSError:
+            pass
+        raise
+    fsync_directory(directory)
+
+
+def atomic_write_json(filename, data, indent=4):
+    """Replace a JSON file's contents in one go
+        filename is text, preferably from constants
+        data is anything json.dump can write
+    """
+    atomic_write_bytes(filename,
+                       json.dumps(data, indent=indent).encode("utf-8"))
+
+
+@contextmanager
+def file_lock(filename):
+    """Hold an exclusive lock on a file (via its ".lock" file) for the
+        length of a with block, waiting for any other process that has
+        it first
+        filename is the file being protected
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(filename + LOCK_SUFFIX, "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,115 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: Score lots of guesses at once with NumPy
+# ======================================
+"""Vectorised versions of the scoring rules in gameengine.py.
+
+score_guesses works out the hints, signs and running score/accuracy for
+a whole array of guesses in one pass, and gives exactly the same
+numbers as playing them one at a time through a GameEngine.
+This module needs NumPy, the game itself does not.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from gameengine import ERR_INDICATOR_DIFFICULTY, STARTING_SCORE
+from gameengine import score_to_accuracy
+from hinttable import MAX_DIFF, get_hint_table
+
+"""Constants."""
+
+# int(score) can only be 0 to 255, so every possible accuracy is worked
+# out with the same round() the game uses (np.round rounds differently)
+ACCURACY_TABLE = np.array([score_to_accuracy(score)
+                           for score in range(STARTING_SCORE + 1)])
+
+# The result of score_guesses, one row per guess.
+# margins is the Standard mode hint for each colour (N x 3)
+# signs is the Expert mode hint for each colour (N x 3)
+# scores is the running score after each guess (N)
+# accuracies is the running accuracy after each guess (N)
+# won is True where the guess was exactly right (N)
+BatchResult = namedtuple("BatchResult",
+                         ["margins", "signs", "scores", "accuracies", "won"])
+
+
+def hex_to_rgb_array(hex_codes):
+    """Turns a list of hex colours (eg "#26e16b" or "26e16b") into an
+        N x 3 array of uint8 red, green and blue values
+    """
+    digits = "".join(hex_code.lstrip("#") for hex_code in hex_codes)
+    return np.frombuffer(bytes.fromhex(digits), dtype=np.uint8).reshape(-1, 3)
+
+
+def game_positions(game_ids):
+    """Works out how many guesses came before each guess in its game.
+        game_ids is a 1D array, where consecutive equal values are the
+         guesses of one game in the order they were made
+    """
+    count = len(game_ids)
+    new_game = np.ones(count, dtype=bool)
+    new_game[1:] = game_ids[1:] != game_ids[:-1]
+    starts = np.flatnonzero(new_game)
+    lengths = np.diff(np.append(starts, count))
+    return np.arange(count) - np.repeat(starts, lengths)
+
+
+def running_scores(factors, positions):
+    """Applies each guess's score factor to the score from the previous
+        guess in the same game.
+        The multiplications are done in the same order as
+        gameengine.next_score, so the floats come out identical.
+        factors is (255 - average_error) / 255 for each guess
+        positions is from game_positions
+    """
+    scores = np.empty(len(factors))
+    if not len(factors):
+        return scores
+    first = positions == 0
+    scores[first] = factors[first] * STARTING_SCORE
+    # Every game is updated at once, one guess number at a time, so the
+    # loop is only as long as the longest game
+    order = np.argsort(positions, kind="stable")
+    guesses_at = np.bincount(positions)
+    start = guesses_at[0]
+    for count in guesses_at[1:]:
+        rows = order[start:start + count]
+        scores[rows] = factors[rows] * scores[rows - 1]
+        start += count
+    return scores
+
+
+def score_guesses(targets,
+                  guesses,
+                  game_ids=None,
+                  log_base=ERR_INDICATOR_DIFFICULTY):
+    """Scores an array of guesses, returning a BatchResult.
+        targets and guesses are N x 3 arrays of red, green and blue
+         values (uint8), one row per guess
+        game_ids says which game each guess belongs to (see
+         game_positions). If it is None all the guesses are one game.
+        log_base is the error margin indicator difficulty (2+)
+    """
+    targets = np.asarray(targets, dtype=np.uint8).reshape(-1, 3)
+    guesses = np.asarray(guesses, dtype=np.uint8).reshape(-1, 3)
+    if targets.shape != guesses.shape:
+        raise ValueError("targets and guesses must be the same shape")
+    diffs = guesses.astype(np.int16) - targets.astype(np.int16)
+    margin_table = np.array(get_hint_table(log_base).margins, dtype=np.int8)
+    margins = margin_table[diffs + MAX_DIFF]
+    signs = np.sign(diffs).astype(np.int8)
+    average_error = np.abs(diffs).sum(axis=1, dtype=np.int64) / 3
+    factors = (255 - average_error) / 255
+    if game_ids is None:
+        # One game, so the running score is just a running product,
+        # which also multiplies in the same order as the game does
+        scores = np.cumprod(np.append(float(STARTING_SCORE), factors))[1:]
+    else:
+        game_ids = np.asarray(game_ids)
+        if game_ids.shape != (len(factors),):
+            raise ValueError("There must be one game id per guess")
+        scores = running_scores(factors, game_positions(game_ids))
+    accuracies = ACCURACY_TABLE[scores.astype(np.int64)]
+    won = ~diffs.any(axis=1)
+    return BatchResult(margins, signs, scores, accuracies, won)
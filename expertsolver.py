@@ -0,0 +1,132 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: A reference bot for Expert mode
+# ======================================
+"""Plays Expert mode by keeping track of every colour still possible.
+
+In Expert mode each hint only says whether a colour was too high, too
+low or right, so there are 256 x 256 x 256 (about 16.7 million) colours
+to narrow down. The hints never mix the colours, so the candidates are
+kept as one 256 long True/False mask per colour (768 values in total)
+instead of a mask of every possible colour. Each guess is picked to
+give the most information (the biggest expected drop in entropy).
+This module needs NumPy, the game itself does not.
+"""
+import numpy as np
+
+from gameengine import DIFFICULTY_EXPERT, MAX_ALLOWED_GUESSES, GameEngine
+from hinttable import MAX_DIFF
+
+"""Constants."""
+
+# Every value a colour can take, ie 0x00 to 0xFF
+CHANNEL_VALUES = np.arange(MAX_DIFF + 1)
+
+
+def split_entropy(below, equal, above):
+    """The information (in bits) from a hint that splits the candidates
+        into those below, equal to and above the guess.
+        Each argument is an array of counts, one per possible guess
+    """
+    total = below + equal + above
+    entropy = np.zeros(below.shape)
+    for count in (below, equal, above):
+        chance = np.divide(count, total,
+                           out=np.zeros(below.shape), where=total > 0)
+        entropy -= chance * np.log2(chance, out=np.zeros(below.shape),
+                                    where=chance > 0)
+    return entropy
+
+
+class ExpertSolver:
+    """
+        Keeps track of the possible target for each colour and picks
+        the next guess. Use it with a GameEngine:
+            guess = solver.next_guess()
+            result = engine.guess_rgb(*guess)
+            solver.update(guess, result.margins)
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget all hints, ready for a new game"""
+        # candidates[colour][value] is True if value could still be the
+        # target for that colour (red, green, blue)
+        self.candidates = np.ones((3, len(CHANNEL_VALUES)), dtype=bool)
+
+    def candidate_counts(self):
+        """How many values each colour could still be"""
+        return self.candidates.sum(axis=1)
+
+    def candidate_count(self):
+        """How many colours could still be the target"""
+        return int(np.prod(self.candidate_counts(), dtype=np.int64))
+
+    def information_gain(self):
+        """The information each possible guess would give, for each
+            colour, as a 3 x 256 array of bits
+        """
+        counts = self.candidates.astype(np.int32)
+        # below[c][g] is the number of candidates lower than g
+        below = np.cumsum(counts, axis=1) - counts
+        above = counts.sum(axis=1, keepdims=True) - below - counts
+        return split_entropy(below, counts, above)
+
+    def next_guess(self):
+        """The guess to make next, as (red, green, blue)"""
+        gain = self.information_gain()
+        # Only guess values that could be right, so a colour that is
+        # already known keeps being guessed correctly
+        gain[~self.candidates] = -1
+        return tuple(int(value) for value in gain.argmax(axis=1))
+
+    def update(self, guess, signs):
+        """Narrow down the possible targets using a hint
+            guess is the (red, green, blue) that was guessed
+            signs are the Expert hints for that guess (see GuessResult),
+             1 if the guess was too high, -1 if too low, 0 if right
+        """
+        guess = np.asarray(guess).reshape(3, 1)
+        signs = np.asarray(signs).reshape(3, 1)
+        # The sign of guess - target must match the hint
+        self.candidates &= np.sign(guess - CHANNEL_VALUES) == signs
+        if not self.candidates.any(axis=1).all():
+            raise ValueError("The hints contradict each other")
+
+    def worst_case_remaining(self):
+        """The most guesses that could still be needed"""
+        # Each guess at least halves what's left of the slowest colour
+        return int(np.floor(np.log2(self.candidate_counts().max()))) + 1
+
+
+def play_game(engine, solver=None):
+    """Plays a GameEngine to the end with an ExpertSolver
+        Returns the engine, so its won/score etc can be checked
+    """
+    if solver is None:
+        solver = ExpertSolver()
+    else:
+        solver.reset()
+    while not engine.game_over:
+        guess = solver.next_guess()
+        result = engine.guess_rgb(*guess)
+        if not engine.game_over:
+            solver.update(guess, result.margins)
+    return engine
+
+
+def worst_case_guesses():
+    """The fewest guesses that always find any target in Expert mode"""
+    return ExpertSolver().worst_case_remaining()
+
+
+# Report on the current settings
+if __name__ == "__main__":
+    print(f"{MAX_ALLOWED_GUESSES} guesses allowed")
+    print(f"Worst case: {worst_case_guesses()} guesses")
+    engine = play_game(GameEngine(DIFFICULTY_EXPERT))
+    print(f"Sample game: {engine.target_colour},"
+          f" {'won' if engine.won else 'lost'} in"
+          f" {engine.guess_count} guesses, accuracy {engine.accuracy}")
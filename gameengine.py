@@ -0,0 +1,235 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: The rules of the game, without any Tk widgets
+# ======================================
+"""The HexaGuessa game rules as a plain Python object.
+
+MainGameLogic drives a GameEngine for the real game, but the engine
+does not need a display or a Tk interpreter, so it can also be used to
+play games in bulk (balancing sweeps, bots, score verification).
+"""
+import random
+from collections import namedtuple
+from hinttable import MAX_DIFF, get_hint_table
+
+"""Constants."""
+
+# The length of each colour guess, ie the length of a Colour Hex Code
+HEX_LENGTH = 6
+# The number of guesses allowed in the main game before it is Game Over
+MAX_ALLOWED_GUESSES = 8
+# How helpful are the error margin indicators.
+# 2 is very easy - must be a value 2 or greater
+ERR_INDICATOR_DIFFICULTY = 2
+# Difficulty levels for the game
+DIFFICULTY_STANDARD = "Standard"
+DIFFICULTY_EXPERT = "Expert"
+# Practice has the Standard hints, but no limit on the number of guesses
+# and no high scores
+DIFFICULTY_PRACTICE = "Practice"
+# The score every game starts with, ie the maximum decimal value of 0xFF
+STARTING_SCORE = 255
+# The characters allowed in a guess
+HEX_DIGITS = "0123456789abcdefABCDEF"
+
+# The result of a single guess.
+# margins is the hint for each colour (red, green, blue)
+# diffs is the actual difference (guess - target) for each colour
+# won / lost say whether this guess ended the game
+GuessResult = namedtuple("GuessResult", ["margins", "diffs", "won", "lost"])
+
+
+def parse_hex(hex_code):
+    """Splits a guess into its red, green and blue values.
+        hex_code is 6 hex digits, optionally starting with #
+        Raises ValueError if it isn't a valid colour
+    """
+    if hex_code.startswith("#"):
+        hex_code = hex_code[1:]
+    if len(hex_code) != HEX_LENGTH or \
+            not all(digit in HEX_DIGITS for digit in hex_code):
+        raise ValueError(f"Not a valid hex colour: {hex_code!r}")
+    return (int(hex_code[0:2], 16),
+            int(hex_code[2:4], 16),
+            int(hex_code[4:6], 16))
+
+
+def random_target(rng=random):
+    """Makes a random colour hex, eg #26e16b
+        rng is anything with a randint method, eg random.Random
+    """
+    return "#%06x" % rng.randint(0, 0xFFFFFF)
+
+
+def error_margin_indicator(number, log_base=ERR_INDICATOR_DIFFICULTY):
+    """Gives a hint as to how far out the player's guess is, roughly
+        the log of the absolute difference between the guessed value
+        and the target value, negative if the guess was too low.
+        This can be adjusted by changing the base log value,
+        contained in ERR_INDICATOR_DIFFICULTY,
+        ie log 2 is easiest , log 3+ will give a wider range.
+        The hints are looked up in a precomputed table (see hinttable.py)
+        number is an integer, indicating error
+    """
+    return get_hint_table(log_base).margins[number + MAX_DIFF]
+
+
+def error_margin_symbols(number, log_base=ERR_INDICATOR_DIFFICULTY):
+    """ Draws the arrows left or right as a hint to the player how
+        far out they are
+        number is an integer, indicating error
+    """
+    return get_hint_table(log_base).symbol(number)
+
+
+def max_guesses_for(difficulty):
+    """The number of guesses allowed for a difficulty, or None if
+        there's no limit
+    """
+    if difficulty == DIFFICULTY_PRACTICE:
+        return None
+    return MAX_ALLOWED_GUESSES
+
+
+def get_sign(value):
+    """ Is the value less than, great than, or equal to zero
+        value is an integer
+    """
+    if value > 0:
+        return 1
+    elif value < 0:
+        return -1
+    else:
+        return 0
+
+
+def next_score(score, diff_red, diff_green, diff_blue):
+    """The score is not displayed, but is used to determin the high
+        score charts. Most weight is given to the initial guesses,
+        since each subsequent guess is easier.
+        score is the score before this guess
+        diff_xxx is an integer value for actual difference
+         between target and guess
+    """
+    average_error = (abs(diff_red) +
+                     abs(diff_green) +
+                     abs(diff_blue)) / 3
+    return ((255 - average_error)/255) * score
+
+
+def score_to_accuracy(score):
+    """Turns the internal score into the percentage shown on the
+        high score charts
+    """
+    return round((int(score)/255)*100, 2)
+
+
+class GameEngine:
+    """
+        One game of HexaGuessa: the target colour, the score so far and
+        the guesses made. It knows nothing about Tk, so the same rules
+        can be played by MainGameLogic or by a bot.
+    """
+    # There can be a lot of these in a simulation, so keep them small
+    __slots__ = ("difficulty", "max_guesses", "log_base", "hint_table",
+                 "target_colour",
+                 "target_red", "target_green", "target_blue", "score",
+                 "guess_count", "won", "lost", "guess_bytes")
+
+    def __init__(self,
+                 difficulty=DIFFICULTY_STANDARD,
+                 target_colour=None,
+                 max_guesses=MAX_ALLOWED_GUESSES,
+                 log_base=ERR_INDICATOR_DIFFICULTY,
+                 rng=random):
+        """difficulty is DIFFICULTY_STANDARD, DIFFICULTY_EXPERT or
+             DIFFICULTY_PRACTICE
+            target_colour is a hex colour, eg #26e16b, or None for a
+             random one
+            max_guesses is the number of guesses before it is Game Over,
+             or None for no limit (see max_guesses_for)
+            log_base is the error margin indicator difficulty (2+)
+            rng is used to pick the random target
+        """
+        self.difficulty = difficulty
+        self.max_guesses = max_guesses
+        self.log_base = log_base
+        self.hint_table = get_hint_table(log_base)
+        if target_colour is None:
+            target_colour = random_target(rng)
+        self.target_red, self.target_green, self.target_blue = \
+            parse_hex(target_colour)
+        self.target_colour = "#%02x%02x%02x" % (self.target_red,
+                                                self.target_green,
+                                                self.target_blue)
+        self.score = STARTING_SCORE
+        self.guess_count = 0
+        self.won = False
+        self.lost = False
+        # Every guess made so far, oldest first, as three bytes each
+        # (red, green, blue), so a Practice game with no limit on
+        # guesses only grows by three bytes a guess
+        self.guess_bytes = bytearray()
+
+    @property
+    def guesses(self):
+        """Every guess made so far, oldest first, as (red, green, blue)
+            (built from guess_bytes each time, eg for the replay once
+            the game is over)
+        """
+        guess_bytes = self.guess_bytes
+        return [tuple(guess_bytes[start:start + 3])
+                for start in range(0, len(guess_bytes), 3)]
+
+    @property
+    def accuracy(self):
+        """The player's accuracy so far, as shown in the high scores"""
+        return score_to_accuracy(self.score)
+
+    @property
+    def game_over(self):
+        """Has the game finished (won or lost)?"""
+        return self.won or self.lost
+
+    def guess(self, hex_code):
+        """Play one guess and return a GuessResult.
+            hex_code is 6 hex digits, optionally starting with #
+        """
+        return self.guess_rgb(*parse_hex(hex_code))
+
+    def guess_rgb(self, guess_red, guess_green, guess_blue):
+        """Play one guess given as its red, green and blue values
+            (integers 0-255) and return a GuessResult.
+        """
+        if self.won or self.lost:
+            raise ValueError("The game is already over")
+        self.guess_count += 1
+        self.guess_bytes += bytes((guess_red, guess_green, guess_blue))
+        # Calculate the error margins for each colour
+        diff_red = guess_red - self.target_red
+        diff_green = guess_green - self.target_green
+        diff_blue = guess_blue - self.target_blue
+        margins = self.hints(diff_red, diff_green, diff_blue)
+        self.score = next_score(self.score, diff_red, diff_green, diff_blue)
+        if diff_red == 0 and diff_green == 0 and diff_blue == 0:
+            self.won = True
+        elif self.max_guesses is not None and \
+                self.guess_count >= self.max_guesses:
+            self.lost = True
+        return GuessResult(margins,
+                           (diff_red, diff_green, diff_blue),
+                           self.won,
+                           self.lost)
+
+    def hints(self, diff_red, diff_green, diff_blue):
+        """Give different "hints" based on difficulty selected
+            diff_xxx is the difference between the guess and the target
+        """
+        if self.difficulty == DIFFICULTY_EXPERT:
+            return (get_sign(diff_red),
+                    get_sign(diff_green),
+                    get_sign(diff_blue))
+        margins = self.hint_table.margins
+        return (margins[diff_red + MAX_DIFF],
+                margins[diff_green + MAX_DIFF],
+                margins[diff_blue + MAX_DIFF])
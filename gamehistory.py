@@ -0,0 +1,250 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: Every game played, kept for statistics
+# ======================================
+"""A record of every finished game, in an SQLite database.
+
+The high scores only keep the best few games, this keeps all of them:
+the target, every guess with its hints, whether it was won, the
+accuracy and how long it took.
+
+So the statistics screen doesn't have to go through every game, each
+game also adds to a running total for its day and difficulty in the
+daily_stats table (an UPSERT, in the same transaction). Questions like
+"win rate this week" only add up a handful of those rows, however many
+games have been played.
+
+    python gamehistory.py gamehistory.db      (prints the statistics)
+"""
+import datetime
+import sqlite3
+import sys
+import time
+
+"""Constants."""
+
+# How many days count as "this week" on the statistics screen
+DAYS_IN_WEEK = 7
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS games ("
+    " id INTEGER PRIMARY KEY,"
+    " difficulty TEXT NOT NULL,"
+    " target TEXT NOT NULL,"
+    " won INTEGER NOT NULL,"
+    " guess_count INTEGER NOT NULL,"
+    " accuracy REAL NOT NULL,"
+    " duration REAL NOT NULL,"
+    " played_at REAL NOT NULL,"
+    " day TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS games_by_day"
+    " ON games (day, difficulty)",
+    "CREATE INDEX IF NOT EXISTS games_by_difficulty"
+    " ON games (difficulty, played_at)",
+    # The hints are the error margins (Standard) or signs (Expert)
+    "CREATE TABLE IF NOT EXISTS guesses ("
+    " game_id INTEGER NOT NULL REFERENCES games (id),"
+    " number INTEGER NOT NULL,"
+    " guess TEXT NOT NULL,"
+    " hint_red INTEGER NOT NULL,"
+    " hint_green INTEGER NOT NULL,"
+    " hint_blue INTEGER NOT NULL,"
+    " PRIMARY KEY (game_id, number)) WITHOUT ROWID",
+    # Running totals for each day and difficulty.
+    # solve_guesses and won_accuracy only count games that were won
+    "CREATE TABLE IF NOT EXISTS daily_stats ("
+    " day TEXT NOT NULL,"
+    " difficulty TEXT NOT NULL,"
+    " games INTEGER NOT NULL,"
+    " wins INTEGER NOT NULL,"
+    " solve_guesses INTEGER NOT NULL,"
+    " won_accuracy REAL NOT NULL,"
+    " duration REAL NOT NULL,"
+    " PRIMARY KEY (day, difficulty)) WITHOUT ROWID",
+)
+
+ADD_TO_DAILY_STATS = (
+    "INSERT INTO daily_stats (day, difficulty, games, wins,"
+    " solve_guesses, won_accuracy, duration)"
+    " VALUES (?, ?, 1, ?, ?, ?, ?)"
+    " ON CONFLICT (day, difficulty) DO UPDATE SET"
+    " games = games + 1,"
+    " wins = wins + excluded.wins,"
+    " solve_guesses = solve_guesses + excluded.solve_guesses,"
+    " won_accuracy = won_accuracy + excluded.won_accuracy,"
+    " duration = duration + excluded.duration")
+
+
+class GameHistoryError(IOError):
+    """Reading or writing the game history failed"""
+
+
+def day_of(timestamp):
+    """The local date of a time.time() value, eg "2025-08-11" """
+    return time.strftime("%Y-%m-%d", time.localtime(timestamp))
+
+
+def week_start(today=None):
+    """The first day of "this week", ie the last DAYS_IN_WEEK days
+        today is a datetime.date, or None for today
+    """
+    today = today or datetime.date.today()
+    return (today - datetime.timedelta(days=DAYS_IN_WEEK - 1)).isoformat()
+
+
+class GameHistory:
+    """Every game played, in an SQLite database"""
+
+    def __init__(self, filename):
+        """filename is text, preferably from constants"""
+        self.filename = filename
+        try:
+            # The game uses the history from a background thread
+            self.connection = sqlite3.connect(filename,
+                                              check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            with self.connection:
+                for statement in SCHEMA:
+                    self.connection.execute(statement)
+        except sqlite3.Error as e:
+            raise GameHistoryError(f"Could not open {filename}: {e}") from e
+
+    def close(self):
+        """Close the database"""
+        self.connection.close()
+
+    def query(self, sql, parameters=()):
+        """Run a query and return all the rows"""
+        try:
+            return self.connection.execute(sql, parameters).fetchall()
+        except sqlite3.Error as e:
+            raise GameHistoryError(f"Game history query failed: {e}") from e
+
+    def record_game(self, engine, duration, played_at=None):
+        """Save a finished game
+            engine is the GameEngine it was played with
+            duration is how long it took, in seconds
+            played_at is a time.time() value, or None for now
+            Returns the game's id
+        """
+        if played_at is None:
+            played_at = time.time()
+        day = day_of(played_at)
+        won = 1 if engine.won else 0
+        guess_rows = []
+        for number, (red, green, blue) in enumerate(engine.guesses):
+            hints = engine.hints(red - engine.target_red,
+                                 green - engine.target_green,
+                                 blue - engine.target_blue)
+            guess_rows.append((number,
+                               "#%02x%02x%02x" % (red, green, blue))
+                              + tuple(hints))
+        try:
+            with self.connection:
+                game_id = self.connection.execute(
+                    "INSERT INTO games (difficulty, target, won,"
+                    " guess_count, accuracy, duration, played_at, day)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (engine.difficulty, engine.target_colour, won,
+                     engine.guess_count, engine.accuracy, duration,
+                     played_at, day)).lastrowid
+                self.connection.executemany(
+                    "INSERT INTO guesses (game_id, number, guess,"
+                    " hint_red, hint_green, hint_blue)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [(game_id,) + row for row in guess_rows])
+                self.connection.execute(
+                    ADD_TO_DAILY_STATS,
+                    (day, engine.difficulty, won,
+                     engine.guess_count * won,
+                     engine.accuracy * won,
+                     duration))
+        except sqlite3.Error as e:
+            raise GameHistoryError(f"Could not save the game: {e}") from e
+        return game_id
+
+    def guesses_for(self, game_id):
+        """The guesses made in one game, in order, as
+            (guess, (hint_red, hint_green, hint_blue))
+        """
+        rows = self.query("SELECT guess, hint_red, hint_green, hint_blue"
+                          " FROM guesses WHERE game_id = ?"
+                          " ORDER BY number", (game_id,))
+        return [(guess, tuple(hints)) for guess, *hints in rows]
+
+    def summary(self, since_day=None):
+        """The statistics for each difficulty, from the daily totals
+            since_day is the first day to count, eg "2025-08-11", or
+             None for every game
+            Returns a dict of difficulty: dict of games, wins,
+             win_rate, mean_guesses (to solve), mean_accuracy (of
+             games won) and mean_duration
+        """
+        rows = self.query("SELECT difficulty, SUM(games), SUM(wins),"
+                          " SUM(solve_guesses), SUM(won_accuracy),"
+                          " SUM(duration)"
+                          " FROM daily_stats WHERE day >= ?"
+                          " GROUP BY difficulty",
+                          (since_day or "",))
+        summary = {}
+        for (difficulty, games, wins, solve_guesses,
+             won_accuracy, duration) in rows:
+            summary[difficulty] = {
+                "games": games,
+                "wins": wins,
+                "win_rate": wins / games * 100,
+                "mean_guesses": solve_guesses / wins if wins else None,
+                "mean_accuracy": won_accuracy / wins if wins else None,
+                "mean_duration": duration / games,
+            }
+        return summary
+
+    def win_rate(self, difficulty, since_day=None):
+        """The percentage of games won for a difficulty (None if no
+            games have been played)
+        """
+        stats = self.summary(since_day).get(difficulty)
+        return stats["win_rate"] if stats else None
+
+    def mean_guesses_to_solve(self, difficulty, since_day=None):
+        """The average number of guesses in the games won for a
+            difficulty (None if none have been won)
+        """
+        stats = self.summary(since_day).get(difficulty)
+        return stats["mean_guesses"] if stats else None
+
+    def rebuild_daily_stats(self):
+        """Work the daily totals out again from every game, eg after
+            games have been deleted by hand
+        """
+        try:
+            with self.connection:
+                self.connection.execute("DELETE FROM daily_stats")
+                self.connection.execute(
+                    "INSERT INTO daily_stats (day, difficulty, games,"
+                    " wins, solve_guesses, won_accuracy, duration)"
+                    " SELECT day, difficulty, COUNT(*), SUM(won),"
+                    " SUM(guess_count * won), SUM(accuracy * won),"
+                    " SUM(duration)"
+                    " FROM games GROUP BY day, difficulty")
+        except sqlite3.Error as e:
+            raise GameHistoryError(
+                f"Could not rebuild the statistics: {e}") from e
+
+
+# Print the statistics, eg
+#   python gamehistory.py gamehistory.db
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python gamehistory.py <gamehistory.db>")
+    history = GameHistory(sys.argv[1])
+    for title, since_day in (("This week", week_start()),
+                             ("All time", None)):
+        print(title)
+        for difficulty, stats in history.summary(since_day).items():
+            mean_guesses = stats["mean_guesses"]
+            print(f"  {difficulty}: {stats['games']} games,"
+                  f" {stats['win_rate']:.1f}% won,"
+                  " mean guesses to solve "
+                  + (f"{mean_guesses:.2f}" if mean_guesses else "-"))
+    history.close()
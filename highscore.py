@@ -1,6 +1,11 @@
 import json
 
+from atomicfile import atomic_write_json, file_lock
+from leaderboard import Leaderboard
+
 HIGHSCORE_FILE = "highscores.json"
+#how many scores are kept for each mode
+TOP_SCORES = 10
 
 class Highscores:
     def __init__(self, filename=HIGHSCORE_FILE):
@@ -17,28 +22,20 @@ class Highscores:
             return {}
 
     def save_highscores(self, highscores):
-        with open(self.filename, 'w') as f:
-            json.dump(highscores, f, indent=4)
+        #writes a new file and swaps it in, so it's never half written
+        atomic_write_json(self.filename, highscores)
             
 
-            #for sorting order
-    def get_score_key(self, score_entry):
-        return score_entry['score']
-
     def add_new_score(self, player_name, score, mode):
-        highscores_by_mode = self.load_highscores()
-
-        #check if mode exists, else creates new list
-        if mode not in highscores_by_mode:
-            highscores_by_mode[mode] = []
-
-        #add new score
-        highscores_by_mode[mode].append({"player_name": player_name, "score": score})
-        #puts scores in order of highest to lowest
-        highscores_by_mode[mode].sort(key=self.get_score_key, reverse=True)
-        #only contains top ten scores
-        highscores_by_mode[mode] = highscores_by_mode[mode][:10]
-        self.save_highscores(highscores_by_mode)
+        #lock the file so another game can't save at the same time
+        with file_lock(self.filename):
+            #keeps the top ten scores for each mode, highest to lowest
+            highscores_by_mode = Leaderboard.from_dict(
+                self.load_highscores(), size=TOP_SCORES)
+
+            #add new score, only save if it made the top ten
+            if highscores_by_mode.add(mode, player_name, score):
+                self.save_highscores(highscores_by_mode.to_dict())
 
     def get_highscores(self, mode=None):
         all_highscores = self.load_highscores()
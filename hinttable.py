@@ -0,0 +1,110 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: Precomputed hints for the error margin indicators
+# ======================================
+"""Lookup tables for the Standard mode hints.
+
+The difference between a guessed colour channel and the target can
+only be one of 511 values (-255..255), so rather than taking a log for
+every channel of every guess we work out every hint once per log base
+and look them up afterwards.
+"""
+import math
+
+"""Constants."""
+
+# The biggest difference there can be between a guess and the target
+# for a single colour, ie 0xFF - 0x00
+MAX_DIFF = 255
+# The hint shown when a colour is exactly right
+SYMBOL_CORRECT = "O"
+# The hint arrows, when the guess is too low or too high
+SYMBOL_TOO_LOW = ">"
+SYMBOL_TOO_HIGH = "<"
+
+
+def calculate_error_margin(number, log_base):
+    """Calculates the "error" in the player's guess to give a hint
+        as to how far out their guess is. We do this my taking the
+        log of the absolute difference between the guessed value and
+        the target value.
+        This is only used to build the tables, everything else should
+        look the value up with get_hint_table(log_base).margins
+        log_base is the base log value. It should be an integer from 2+
+        number is an integer, indicating error
+    """
+    # Calculates the logarithm of the absolute of a number and
+    # rounds it up to the next integer.
+    # If the original number is negative it then returns this value
+    # as a negative.
+    # Need to add 1, since if you are out by 1 then log will return
+    # zero, but the guess is still not quite correct
+    if number == 0:
+        return 0
+    elif number < 0:
+        margin = -math.ceil(math.log(-(number), log_base))-1
+        if margin < -1:
+            margin = margin + 1
+    else:
+        margin = math.ceil(math.log(number, log_base)) + 1
+        if margin > 1:
+            margin = margin - 1
+    return margin
+
+
+class HintTable:
+    """
+        Every hint for one log base (ERR_INDICATOR_DIFFICULTY).
+        margins[diff + MAX_DIFF] is the error margin for diff, and
+        symbols[margin + max_margin] is the arrows drawn for margin.
+    """
+    __slots__ = ("log_base", "margins", "max_margin", "symbols")
+
+    def __init__(self, log_base):
+        """log_base is the base log value. It should be an integer 2+"""
+        if log_base < 2:
+            raise ValueError(f"The log base must be 2 or more: {log_base}")
+        self.log_base = log_base
+        self.margins = tuple(calculate_error_margin(diff, log_base)
+                             for diff in range(-MAX_DIFF, MAX_DIFF + 1))
+        # Expert mode hints are -1, 0 or 1, so there must always be
+        # symbols for those, whatever the base
+        self.max_margin = max(max(self.margins), 1)
+        symbols = []
+        for margin in range(-self.max_margin, self.max_margin + 1):
+            if margin == 0:
+                symbols.append(SYMBOL_CORRECT)
+            elif margin < 0:
+                symbols.append(SYMBOL_TOO_LOW * -margin)
+            else:
+                symbols.append(SYMBOL_TOO_HIGH * margin)
+        self.symbols = tuple(symbols)
+
+    def margin(self, number):
+        """The error margin for a difference between guess and target
+            number is an integer from -255 to 255
+        """
+        return self.margins[number + MAX_DIFF]
+
+    def symbol(self, margin):
+        """The arrows to draw for an error margin
+            margin is an integer from margin()
+        """
+        return self.symbols[margin + self.max_margin]
+
+
+# The tables built so far, by log base. A table is only built the first
+# time its base is asked for, and there are only a handful of bases
+# that make sense, so they are never thrown away.
+_hint_tables = {}
+
+
+def get_hint_table(log_base):
+    """Get the (cached) HintTable for a log base
+        log_base is the base log value, eg ERR_INDICATOR_DIFFICULTY
+    """
+    table = _hint_tables.get(log_base)
+    if table is None:
+        table = HintTable(log_base)
+        _hint_tables[log_base] = table
+    return table
@@ -0,0 +1,114 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: Bounded top scores for each game mode
+# ======================================
+"""A leaderboard that only ever holds the top K scores for each mode.
+
+Each mode's scores are kept sorted, best first, so the score to beat
+(the "floor") is read straight off the end of the list and a score that
+doesn't make the board is turned away without touching it. A score
+that does is placed with a binary search.
+"""
+from bisect import bisect_left, bisect_right
+
+"""Constants."""
+
+# How many scores are shown for each difficulty in the game
+LEADERBOARD_SIZE = 3
+
+
+class Leaderboard:
+    """
+        The top scores for each mode, as the entries used in the high
+        score file, ie {"player_name": ..., "score": ...}
+    """
+
+    def __init__(self, size=LEADERBOARD_SIZE, sizes=None):
+        """size is how many scores to keep for each mode
+            sizes is a dict of mode: size, for modes that keep a
+             different number of scores
+        """
+        self.size = size
+        self.sizes = dict(sizes or {})
+        # The entries for each mode, best first
+        self.entries = {}
+        # The negated scores for each mode, in the same order as the
+        # entries, so they go up and can be searched with bisect
+        self.keys = {}
+
+    @classmethod
+    def from_dict(cls, all_scores, size=LEADERBOARD_SIZE, sizes=None):
+        """Make a leaderboard from the high score file's contents
+            all_scores is a dict of mode: list of entries
+        """
+        leaderboard = cls(size, sizes)
+        for mode, scores in all_scores.items():
+            # Python's sort is stable, so equal scores stay in order
+            scores = sorted(scores, reverse=True, key=lambda x: x['score'])
+            leaderboard.entries[mode] = scores
+            leaderboard.keys[mode] = [-entry["score"] for entry in scores]
+        return leaderboard
+
+    def to_dict(self):
+        """The leaderboard in the format of the high score file"""
+        return {mode: list(scores) for mode, scores in self.entries.items()}
+
+    def add_mode(self, mode):
+        """Make sure there's a (maybe empty) list of scores for a mode"""
+        self.entries.setdefault(mode, [])
+        self.keys.setdefault(mode, [])
+
+    def size_for(self, mode):
+        """How many scores are kept for a mode"""
+        return self.sizes.get(mode, self.size)
+
+    def floor(self, mode):
+        """The score to beat to get on the board, or 0 if it isn't full
+            yet - used to determine whether a winning game is good
+            enough to make the charts
+        """
+        size = self.size_for(mode)
+        scores = self.entries.get(mode, [])
+        if len(scores) < size:
+            return 0
+        return scores[size - 1]["score"]
+
+    def qualifies(self, mode, score):
+        """Would this score make the board? A score equal to the floor
+            doesn't, since it would go below the scores already there
+        """
+        scores = self.entries.get(mode, [])
+        return len(scores) < self.size_for(mode) or \
+            score > scores[self.size_for(mode) - 1]["score"]
+
+    def add(self, mode, player_name, score):
+        """Add a score if it makes the board.
+            Returns True if it did
+        """
+        if not self.qualifies(mode, score):
+            return False
+        self.add_mode(mode)
+        scores = self.entries[mode]
+        keys = self.keys[mode]
+        # Place it after any equal scores, since they were there first
+        position = bisect_right(keys, -score)
+        keys.insert(position, -score)
+        scores.insert(position, {"player_name": player_name, "score": score})
+        # Drop the score that fell off the bottom
+        if len(scores) > self.size_for(mode):
+            del scores[self.size_for(mode):]
+            del keys[self.size_for(mode):]
+        return True
+
+    def top(self, mode, count=None):
+        """The best scores for a mode, best first"""
+        scores = self.entries.get(mode, [])
+        return scores[:count or self.size_for(mode)]
+
+    def rank(self, mode, score):
+        """Where a score would be placed for a mode (1 is top)"""
+        return bisect_left(self.keys.get(mode, []), -score) + 1
+
+    def modes(self):
+        """Every mode on the board"""
+        return list(self.entries)
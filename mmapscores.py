@@ -0,0 +1,333 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: High scores as fixed size records in a memory mapped file
+# ======================================
+"""A binary high score file that is read in place, without parsing.
+
+Player names are at most 20 characters (see validate_player_name) and
+scores are floats, so every score fits in a fixed size record. The file
+is memory mapped and laid out as:
+
+    header        magic b"HXSC", version, number of modes
+    mode table    MAX_MODES entries of (name, capacity, count, offset)
+    records       for each mode, `capacity` records, best score first
+
+Reading the top scores or a rank just unpacks the records needed, and a
+new score is put in place by moving the records below it down one slot.
+MmapScoreStore has the same methods as the stores in scorestore.py, and
+json_to_mmap / mmap_to_json convert between this and highscores.json.
+
+    python mmapscores.py highscores.json highscores.hxs
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+
+from atomicfile import atomic_write_bytes, atomic_write_json, file_lock
+from leaderboard import LEADERBOARD_SIZE
+from scorestore import ScoreStoreError, empty_scores
+
+"""Constants."""
+
+# Identifies the file type, and the layout version
+MAGIC = b"HXSC"
+VERSION = 1
+# magic, version, number of modes (padded to 16 bytes)
+HEADER = struct.Struct("<4sHH8x")
+# The longest mode name
+MAX_MODE_NAME_LENGTH = 24
+# mode name, capacity, count, offset of its first record
+MODE_ENTRY = struct.Struct(f"<{MAX_MODE_NAME_LENGTH}sIIQ")
+# Where the count is inside a mode entry, to read it on its own
+COUNT_OFFSET = MAX_MODE_NAME_LENGTH + 4
+COUNT = struct.Struct("<I")
+# The most modes (difficulties) the file can hold
+MAX_MODES = 16
+# The longest player name, as in EnterHighScoreScreen
+MAX_NAME_LENGTH = 20
+# player name, score
+RECORD = struct.Struct(f"<{MAX_NAME_LENGTH}s4xd")
+# Where the score is inside a record, to read it on its own
+SCORE_OFFSET = MAX_NAME_LENGTH + 4
+SCORE = struct.Struct("<d")
+# Where the mode table and the records start
+MODE_TABLE_START = HEADER.size
+RECORDS_START = MODE_TABLE_START + MAX_MODES * MODE_ENTRY.size
+
+
+def encode_name(name, max_length):
+    """Turn a name into the bytes stored in the file"""
+    encoded = name.encode("utf-8")
+    if len(encoded) > max_length:
+        raise ValueError(f"Name too long for the score file: {name!r}")
+    return encoded
+
+
+def build_score_file(all_scores, size=LEADERBOARD_SIZE, sizes=None):
+    """Make the contents of a score file
+        all_scores is a dict of mode: list of entries, like the JSON file
+        size and sizes are how many scores to keep for each mode
+        Returns bytes
+    """
+    sizes = sizes or {}
+    if len(all_scores) > MAX_MODES:
+        raise ValueError(f"A score file can only hold {MAX_MODES} modes")
+    data = bytearray(RECORDS_START)
+    HEADER.pack_into(data, 0, MAGIC, VERSION, len(all_scores))
+    for index, (mode, scores) in enumerate(all_scores.items()):
+        capacity = max(sizes.get(mode, size), len(scores))
+        scores = sorted(scores, reverse=True, key=lambda x: x['score'])
+        MODE_ENTRY.pack_into(data,
+                             MODE_TABLE_START + index * MODE_ENTRY.size,
+                             encode_name(mode, MAX_MODE_NAME_LENGTH),
+                             capacity,
+                             len(scores),
+                             len(data))
+        records = bytearray(capacity * RECORD.size)
+        for position, entry in enumerate(scores):
+            RECORD.pack_into(records, position * RECORD.size,
+                             encode_name(entry["player_name"],
+                                         MAX_NAME_LENGTH),
+                             entry["score"])
+        data += records
+    return bytes(data)
+
+
+class MmapScoreStore:
+    """The high scores in a memory mapped file of fixed size records"""
+
+    def __init__(self, filename, size=LEADERBOARD_SIZE, sizes=None):
+        """filename is text, preferably from constants
+            size is how many scores to keep for each mode
+            sizes is a dict of mode: size, for modes that keep a
+             different number of scores
+            (both only matter when a mode is first added)
+        """
+        self.filename = filename
+        self.size = size
+        self.sizes = dict(sizes or {})
+        self.write_lock = threading.Lock()
+        if not os.path.exists(filename):
+            with file_lock(filename):
+                if not os.path.exists(filename):
+                    atomic_write_bytes(filename, build_score_file(
+                        empty_scores(), size, sizes))
+        self.file = None
+        self.map = None
+        # mode: (index in the mode table, capacity, offset)
+        self.modes = {}
+        self.open_map()
+
+    def open_map(self):
+        """Map the file and read its mode table"""
+        self.close()
+        try:
+            self.file = open(self.filename, "r+b")
+            self.map = mmap.mmap(self.file.fileno(), 0)
+        except (OSError, ValueError) as e:
+            raise ScoreStoreError(f"Could not open {self.filename}: {e}")
+        try:
+            magic, version, mode_count = HEADER.unpack_from(self.map, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("wrong header")
+            self.modes = {}
+            for index in range(mode_count):
+                name, capacity, count, offset = MODE_ENTRY.unpack_from(
+                    self.map, MODE_TABLE_START + index * MODE_ENTRY.size)
+                self.modes[name.rstrip(b"\0").decode("utf-8")] = \
+                    (index, capacity, offset)
+        except (struct.error, ValueError) as e:
+            raise ScoreStoreError(
+                f"{self.filename} is not a score file: {e}") from e
+
+    def close(self):
+        """Unmap and close the file"""
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def refresh(self):
+        """Pick up any modes another process has added since the file
+            was mapped (the file is replaced when that happens)
+        """
+        try:
+            replaced = os.stat(self.filename).st_ino != \
+                os.fstat(self.file.fileno()).st_ino
+        except OSError as e:
+            raise ScoreStoreError(f"Could not read {self.filename}: {e}")
+        if replaced:
+            self.open_map()
+
+    def count(self, mode):
+        """How many scores a mode has (read from the file)"""
+        index = self.modes[mode][0]
+        return COUNT.unpack_from(
+            self.map,
+            MODE_TABLE_START + index * MODE_ENTRY.size + COUNT_OFFSET)[0]
+
+    def set_count(self, mode, count):
+        """Change how many scores a mode has"""
+        index = self.modes[mode][0]
+        COUNT.pack_into(
+            self.map,
+            MODE_TABLE_START + index * MODE_ENTRY.size + COUNT_OFFSET,
+            count)
+
+    def score_at(self, offset, position):
+        """The score in one record, without unpacking the rest"""
+        return SCORE.unpack_from(
+            self.map, offset + position * RECORD.size + SCORE_OFFSET)[0]
+
+    def records(self, mode, count):
+        """The first `count` entries for a mode, best first"""
+        if mode not in self.modes:
+            return []
+        offset = self.modes[mode][2]
+        entries = []
+        for position in range(min(count, self.count(mode))):
+            name, score = RECORD.unpack_from(self.map,
+                                             offset + position * RECORD.size)
+            entries.append({"player_name":
+                            name.rstrip(b"\0").decode("utf-8"),
+                            "score": score})
+        return entries
+
+    def all_scores(self):
+        """Every score, in the format of the high score JSON file"""
+        self.refresh()
+        return {mode: self.records(mode, self.modes[mode][1])
+                for mode in self.modes}
+
+    def top_scores(self, difficulty, count=None):
+        """The best scores for a difficulty, best first"""
+        self.refresh()
+        if count is None:
+            count = self.sizes.get(difficulty, self.size)
+        return self.records(difficulty, count)
+
+    def lowest_score(self, difficulty):
+        """The score to beat to get on the board (0 if it isn't full)"""
+        self.refresh()
+        if difficulty not in self.modes:
+            return 0
+        index, capacity, offset = self.modes[difficulty]
+        if self.count(difficulty) < capacity:
+            return 0
+        return self.score_at(offset, capacity - 1)
+
+    def position_of(self, difficulty, score, after_equal):
+        """Binary search for where a score goes among a mode's records.
+            If after_equal, it goes after any equal scores, otherwise
+            before them
+        """
+        offset = self.modes[difficulty][2]
+        low, high = 0, self.count(difficulty)
+        while low < high:
+            middle = (low + high) // 2
+            middle_score = self.score_at(offset, middle)
+            if middle_score > score or \
+                    (after_equal and middle_score == score):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def rank(self, difficulty, score):
+        """Where a score would be placed for a difficulty (1 is top)"""
+        self.refresh()
+        if difficulty not in self.modes:
+            return 1
+        return self.position_of(difficulty, score, False) + 1
+
+    def add_mode(self, mode):
+        """Add an empty mode at the end of the file. The file is
+            rebuilt, since it has to grow.
+            Only call this while holding the file lock
+        """
+        all_scores = self.all_scores()
+        all_scores[mode] = []
+        sizes = {name: capacity
+                 for name, (_, capacity, _) in self.modes.items()}
+        sizes[mode] = self.sizes.get(mode, self.size)
+        atomic_write_bytes(self.filename,
+                           build_score_file(all_scores, self.size, sizes))
+        self.open_map()
+
+    def add_score(self, difficulty, player_name, score):
+        """Add one score
+            Returns False if the score doesn't make the board
+        """
+        return self.add_scores([(difficulty, player_name, score)])[0]
+
+    def add_scores(self, entries):
+        """Add lots of scores, each moved into place in the file
+            entries is a list of (difficulty, player_name, score)
+            Returns a list saying whether each one made the board
+        """
+        added = []
+        with self.write_lock, file_lock(self.filename):
+            self.refresh()
+            for difficulty, player_name, score in entries:
+                record = RECORD.pack(encode_name(player_name,
+                                                 MAX_NAME_LENGTH),
+                                     score)
+                if difficulty not in self.modes:
+                    self.add_mode(difficulty)
+                _, capacity, offset = self.modes[difficulty]
+                count = self.count(difficulty)
+                # Place it after any equal scores, since they were there
+                # first
+                position = self.position_of(difficulty, score, True)
+                if position >= capacity:
+                    added.append(False)
+                    continue
+                # Move everything below it down one, dropping the last
+                # record if the board is full
+                moving = min(count, capacity - 1) - position
+                if moving > 0:
+                    start = offset + position * RECORD.size
+                    self.map.move(start + RECORD.size,
+                                  start,
+                                  moving * RECORD.size)
+                self.map[offset + position * RECORD.size:
+                         offset + (position + 1) * RECORD.size] = record
+                self.set_count(difficulty, min(count + 1, capacity))
+                added.append(True)
+            self.map.flush()
+        return added
+
+
+def json_to_mmap(json_filename, mmap_filename,
+                 size=LEADERBOARD_SIZE, sizes=None):
+    """Convert a high score JSON file to a memory mapped score file"""
+    with open(json_filename, "r") as high_score_file:
+        all_scores = json.load(high_score_file)
+    atomic_write_bytes(mmap_filename,
+                       build_score_file(all_scores, size, sizes))
+
+
+def mmap_to_json(mmap_filename, json_filename):
+    """Convert a memory mapped score file to a high score JSON file"""
+    store = MmapScoreStore(mmap_filename)
+    try:
+        atomic_write_json(json_filename, store.all_scores())
+    finally:
+        store.close()
+
+
+# Convert a score file, the direction depends on the file names, eg
+#   python mmapscores.py highscores.json highscores.hxs
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python mmapscores.py <from> <to>")
+    if sys.argv[1].lower().endswith(".json"):
+        json_to_mmap(sys.argv[1], sys.argv[2])
+    else:
+        mmap_to_json(sys.argv[1], sys.argv[2])
+    print(f"Converted {sys.argv[1]} to {sys.argv[2]}")
@@ -0,0 +1,200 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: Keeps scores safe until the score server has them
+# ======================================
+"""A queue of scores waiting to be sent to the score server.
+
+When the leaderboard is on a score server (see remotescores.py) and the
+network is down, a new high score shouldn't be lost, or keep the player
+waiting. Scores are put in the outbox instead: each one is added to the
+end of an outbox file on disk (flushed to disk straight away), and a
+background thread sends them to the server, oldest first, a batch at a
+time down one connection.
+
+If the server can't be reached the thread waits before trying again,
+twice as long each time up to a limit. Once a batch has been sent it is
+removed from the file. The same score put in twice (eg Submit pressed
+twice) is only kept once. Anything still waiting when the game closes
+is sent the next time it starts. A score the server refuses (eg its
+replay is damaged) is never going to be accepted, so it is moved aside
+to a file of its own rather than holding up the scores behind it.
+"""
+import json
+import logging
+import os
+import threading
+
+from atomicfile import atomic_write_bytes
+from scorestore import ScoreStoreError
+from verify import submission_from_json, submission_to_json
+
+"""Constants."""
+
+# How many scores to send at a time
+BATCH_SIZE = 50
+# How long (in seconds) to wait before the first retry, and the longest
+# wait between retries
+FIRST_RETRY_DELAY = 1
+MAX_RETRY_DELAY = 60
+# How long (in seconds) to wait for the thread to stop when closing
+STOP_TIMEOUT = 5
+# Added to the outbox's filename for the file refused scores are moved to
+REFUSED_SUFFIX = ".refused"
+
+log = logging.getLogger(__name__)
+
+
+def encode_line(submission):
+    """One submission as a line of the outbox file, as bytes.
+        The keys are sorted, so the same submission always gives the
+        same line
+    """
+    return json.dumps(submission_to_json(submission),
+                      sort_keys=True).encode("utf-8") + b"\n"
+
+
+class Outbox:
+    """Scores waiting to be sent, kept on disk until they have been"""
+
+    def __init__(self, filename, store, batch_size=BATCH_SIZE,
+                 first_retry_delay=FIRST_RETRY_DELAY,
+                 max_retry_delay=MAX_RETRY_DELAY):
+        """filename is text, preferably from constants
+            store is where the scores go, eg a RemoteScoreStore (it must
+             have add_submissions)
+            batch_size is how many scores to send at a time
+            first_retry_delay and max_retry_delay are how long to wait
+             between tries (seconds)
+        """
+        self.filename = filename
+        self.store = store
+        self.batch_size = batch_size
+        self.first_retry_delay = first_retry_delay
+        self.max_retry_delay = max_retry_delay
+        # Protects everything below, and is waited on for changes
+        self.changed = threading.Condition()
+        # The lines waiting to be sent, oldest first
+        self.pending = []
+        # How many submissions have ever been queued, and sent, since
+        # the game started (used to wait for one to be sent)
+        self.queued_count = 0
+        self.sent_count = 0
+        self.stopping = False
+        self.load()
+        self.thread = threading.Thread(target=self.run,
+                                       name="Outbox",
+                                       daemon=True)
+        self.thread.start()
+
+    def load(self):
+        """Read anything left over from last time"""
+        try:
+            with open(self.filename, "rb") as outbox_file:
+                lines = outbox_file.readlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            # A line cut short by a crash is ignored
+            if not line.endswith(b"\n") or line in self.pending:
+                continue
+            try:
+                submission_from_json(json.loads(line))
+            except (ValueError, KeyError) as e:
+                log.warning("Ignoring a damaged line in %s: %s",
+                            self.filename, e)
+                continue
+            self.pending.append(line)
+        self.queued_count = len(self.pending)
+
+    def add(self, submission, wait=None):
+        """Queue a score to be sent (a verify.Submission).
+            It is on disk by the time this returns.
+            wait is how long (in seconds) to wait for it to be sent, or
+             None not to wait
+            Returns True if it has been sent
+        """
+        line = encode_line(submission)
+        with self.changed:
+            if line in self.pending:
+                # Already waiting to go
+                number = self.sent_count + self.pending.index(line) + 1
+            else:
+                outbox_fd = os.open(self.filename,
+                                    os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                                    0o644)
+                try:
+                    os.write(outbox_fd, line)
+                    os.fsync(outbox_fd)
+                finally:
+                    os.close(outbox_fd)
+                self.pending.append(line)
+                self.queued_count += 1
+                number = self.queued_count
+            self.changed.notify_all()
+            if wait is not None:
+                self.changed.wait_for(lambda: self.sent_count >= number,
+                                      wait)
+            return self.sent_count >= number
+
+    def pending_count(self):
+        """How many scores are waiting to be sent"""
+        with self.changed:
+            return len(self.pending)
+
+    def run(self):
+        """The background thread: send batches until told to stop"""
+        retry_delay = self.first_retry_delay
+        while True:
+            with self.changed:
+                self.changed.wait_for(
+                    lambda: self.pending or self.stopping)
+                if self.stopping:
+                    return
+                batch = self.pending[:self.batch_size]
+            try:
+                accepted = self.store.add_submissions(
+                    [submission_from_json(json.loads(line))
+                     for line in batch])
+            except ScoreStoreError as e:
+                log.warning("Could not send scores, trying again in %ss:"
+                            " %s", retry_delay, e)
+                with self.changed:
+                    self.changed.wait_for(lambda: self.stopping,
+                                          retry_delay)
+                retry_delay = min(retry_delay * 2, self.max_retry_delay)
+                continue
+            retry_delay = self.first_retry_delay
+            refused = [line for line, ok in zip(batch, accepted) if not ok]
+            if refused:
+                log.warning("The score server turned away %d scores,"
+                            " moving them to %s", len(refused),
+                            self.filename + REFUSED_SUFFIX)
+                self.move_aside(refused)
+            with self.changed:
+                # Only this thread removes lines, so the batch is still
+                # at the front
+                del self.pending[:len(batch)]
+                self.sent_count += len(batch)
+                try:
+                    atomic_write_bytes(self.filename, b"".join(self.pending))
+                except OSError as e:
+                    # They'll be sent again next time the game starts
+                    log.error("Could not update %s: %s", self.filename, e)
+                self.changed.notify_all()
+
+    def move_aside(self, lines):
+        """Keep refused lines in a file of their own, in case someone
+            wants to look at them
+        """
+        try:
+            with open(self.filename + REFUSED_SUFFIX, "ab") as refused_file:
+                refused_file.writelines(lines)
+        except OSError as e:
+            log.error("Could not save the refused scores: %s", e)
+
+    def stop(self):
+        """Stop sending (anything not sent yet stays in the file)"""
+        with self.changed:
+            self.stopping = True
+            self.changed.notify_all()
+        self.thread.join(STOP_TIMEOUT)
@@ -0,0 +1,223 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: Uses a shared leaderboard server instead of a local file
+# ======================================
+"""The client side of scoreserver.py.
+
+RemoteScoreStore has the same methods as the stores in scorestore.py,
+so the screens don't know the scores are on another machine. Opening a
+connection for every request would add a round trip or two to every
+screen change, so connections are kept open and reused from a small
+pool, and several requests can be sent down one connection before any
+of the answers are read (pipelined), eg a batch of scores.
+
+Scores can only be added with their replays (add_submissions), the
+server checks them before saving them.
+"""
+import json
+import queue
+import socket
+import threading
+
+from leaderboard import LEADERBOARD_SIZE
+from scoreserver import DEFAULT_PORT, encode_message
+from scorestore import REMOTE_PREFIX, ScoreStoreError
+from verify import submission_to_json
+
+"""Constants."""
+
+# How many idle connections to keep open
+POOL_SIZE = 2
+# How long (in seconds) to wait to connect or for an answer
+TIMEOUT = 5
+
+
+def parse_address(address):
+    """Turn "tcp://host:port" (or "host:port", or "host") into
+        (host, port)
+    """
+    if address.lower().startswith(REMOTE_PREFIX):
+        address = address[len(REMOTE_PREFIX):]
+    host, _, port = address.rpartition(":")
+    if not host:
+        return port, DEFAULT_PORT
+    return host, int(port)
+
+
+class Connection:
+    """One open connection to the score server"""
+
+    def __init__(self, address, timeout):
+        """address is (host, port)
+            timeout is how long to wait, in seconds
+        """
+        self.socket = socket.create_connection(address, timeout)
+        # Requests are small, send them straight away
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.socket.makefile("rb")
+
+    def exchange(self, requests):
+        """Send every request, then read an answer for each
+            Returns the answers, in order
+        """
+        self.socket.sendall(b"".join(encode_message(request)
+                                     for request in requests))
+        responses = []
+        for _ in requests:
+            line = self.reader.readline()
+            if not line:
+                raise ConnectionError("The score server hung up")
+            responses.append(json.loads(line))
+        return responses
+
+    def close(self):
+        """Close the connection"""
+        self.reader.close()
+        self.socket.close()
+
+
+class RemoteScoreStore:
+    """The high scores on a score server (see scoreserver.py)"""
+
+    def __init__(self, address, size=LEADERBOARD_SIZE, sizes=None,
+                 pool_size=POOL_SIZE, timeout=TIMEOUT):
+        """address is "tcp://host:port"
+            size is how many scores to show for each difficulty
+            sizes is a dict of difficulty: size, for any difficulties
+             that show a different number of scores
+            pool_size is how many idle connections to keep open
+            timeout is how long to wait for the server, in seconds
+        """
+        self.address = parse_address(address)
+        self.size = size
+        self.sizes = dict(sizes or {})
+        self.timeout = timeout
+        # Idle connections, ready to be reused
+        self.idle = queue.LifoQueue(pool_size)
+        self.id_lock = threading.Lock()
+        self.next_id = 0
+
+    def connection(self):
+        """An idle connection, or a new one if there aren't any"""
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            return Connection(self.address, self.timeout)
+
+    def release(self, connection):
+        """Put a connection back in the pool, or close it if the pool is
+            full
+        """
+        try:
+            self.idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def pipeline(self, requests):
+        """Send several requests down one connection and wait for all
+            the answers
+            requests is a list of dicts, each with "op" and its
+             arguments
+            Returns a list of responses, in order, each a dict with "ok"
+             and either "result" or "error" (a request the server
+             refused doesn't stop the others)
+            Raises ScoreStoreError if the server couldn't be reached or
+             stopped answering
+        """
+        with self.id_lock:
+            first_id = self.next_id
+            self.next_id += len(requests)
+        requests = [dict(request, id=first_id + number)
+                    for number, request in enumerate(requests)]
+        # A pooled connection may have been closed by the server since
+        # it was last used, so try once more on a new one (the server
+        # only stores a resent submission once)
+        for attempt in range(2):
+            try:
+                connection = self.connection()
+            except OSError as e:
+                raise ScoreStoreError(
+                    f"Could not reach the score server: {e}") from e
+            try:
+                responses = connection.exchange(requests)
+            except (OSError, ValueError) as e:
+                connection.close()
+                if attempt:
+                    raise ScoreStoreError(
+                        f"The score server stopped answering: {e}") from e
+                continue
+            self.release(connection)
+            break
+        for request, response in zip(requests, responses):
+            if not isinstance(response, dict):
+                raise ScoreStoreError(f"The score server sent {response!r}"
+                                      f" instead of an answer")
+            if response.get("id") != request["id"]:
+                raise ScoreStoreError("The score server answered out of"
+                                      " order")
+        return responses
+
+    def request(self, op, **arguments):
+        """Send one request and return its result
+            Raises ScoreStoreError if it failed
+        """
+        response = self.pipeline([dict(arguments, op=op)])[0]
+        if not response.get("ok"):
+            raise ScoreStoreError(f"The score server refused {op}:"
+                                  f" {response.get('error')}")
+        if "result" not in response:
+            raise ScoreStoreError(f"The score server didn't say what {op}"
+                                  f" gave")
+        return response["result"]
+
+    def all_scores(self):
+        """The top scores for every difficulty"""
+        return self.request("all")
+
+    def top_scores(self, difficulty, count=None):
+        """The best scores for a difficulty, best first"""
+        return self.request("top",
+                            difficulty=difficulty,
+                            count=count or self.sizes.get(difficulty,
+                                                          self.size))
+
+    def lowest_score(self, difficulty):
+        """The score to beat to get on the board (0 if it isn't full)"""
+        return self.request("lowest", difficulty=difficulty)
+
+    def rank(self, difficulty, score):
+        """Where a score would be placed for a difficulty (1 is top)"""
+        return self.request("rank", difficulty=difficulty, score=score)
+
+    def add_score(self, difficulty, player_name, score):
+        """Scores can't be added without their replays"""
+        return self.add_scores([(difficulty, player_name, score)])[0]
+
+    def add_scores(self, entries):
+        """Scores can't be added without their replays, so this always
+            raises ScoreStoreError - use add_submissions
+        """
+        raise ScoreStoreError("The score server only takes scores with"
+                              " their replays")
+
+    def add_submissions(self, submissions):
+        """Send scores with their replays, all down one connection
+            submissions is a list of verify.Submission
+            Returns a list saying whether the server accepted each one
+             (one it refused, eg a damaged replay, is False, it will
+             never be accepted)
+            Raises ScoreStoreError if the server couldn't be reached
+        """
+        responses = self.pipeline(
+            [{"op": "submit", "submission": submission_to_json(submission)}
+             for submission in submissions])
+        return [bool(response.get("ok") and response.get("result"))
+                for response in responses]
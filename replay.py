@@ -0,0 +1,296 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: Saves games as compact binary replays and plays them back
+# ======================================
+"""Compact replays of finished games.
+
+A replay is just enough to play the game again through the rules:
+
+    header    version, difficulty, ERR_INDICATOR_DIFFICULTY, max guesses
+              (one byte each, max guesses is 0 if there's no limit, ie
+              Practice)
+    target    red, green, blue (one byte each)
+    guesses   red, green, blue for each guess, in the order played
+
+Each replay is written with its length in front (as a varint), so any
+number of them can be appended to the same file and read back one after
+another. A Standard game of 5 guesses is 23 bytes.
+
+fast_replay re-runs a replay straight from its bytes to get the result
+(won or lost, accuracy), using a table for the score, so corpora of
+replays can be checked quickly, and replay_file_batch does a whole file
+at once with NumPy. replay_engine plays one through a GameEngine
+instead, for the hints as well, and HexaGuessa.py can show one on the
+game screen:
+
+    python HexaGuessa.py --replay replays.hxr
+
+    python replay.py replays.hxr          (checks and summarises a file)
+"""
+import os
+import sys
+import time
+from collections import namedtuple
+
+from gameengine import (DIFFICULTY_EXPERT, DIFFICULTY_PRACTICE,
+                        DIFFICULTY_STANDARD, STARTING_SCORE, GameEngine,
+                        next_score, score_to_accuracy)
+
+"""Constants."""
+
+# The replay layout version, in case it ever changes
+REPLAY_VERSION = 1
+# How each difficulty is stored in the header
+DIFFICULTY_CODES = (DIFFICULTY_STANDARD, DIFFICULTY_EXPERT,
+                    DIFFICULTY_PRACTICE)
+# The max guesses stored for a game with no limit
+UNLIMITED_GUESSES = 0
+# The header and the target, before the first guess
+HEADER_LENGTH = 4
+GUESSES_START = HEADER_LENGTH + 3
+# The largest total error a guess can have (255 on each colour)
+MAX_TOTAL_ERROR = 3 * 255
+# The score multiplier for every possible total error, worked out with
+# next_score so replays score exactly like the game
+SCORE_FACTORS = tuple(next_score(1.0, total, 0, 0)
+                      for total in range(MAX_TOTAL_ERROR + 1))
+
+# A saved game.
+# target and each guess are (red, green, blue)
+Replay = namedtuple("Replay", ["difficulty", "log_base", "max_guesses",
+                               "target", "guesses"])
+# The outcome of playing a replay back
+ReplayResult = namedtuple("ReplayResult", ["won", "lost", "guess_count",
+                                           "accuracy"])
+
+
+def encode_varint(number):
+    """The bytes of a non-negative integer, 7 bits at a time, lowest
+        first, with the top bit set on every byte but the last
+    """
+    encoded = bytearray()
+    while number >= 0x80:
+        encoded.append((number & 0x7F) | 0x80)
+        number >>= 7
+    encoded.append(number)
+    return bytes(encoded)
+
+
+def decode_varint(data, position):
+    """Read a varint from data at position
+        Returns (the number, the position after it)
+    """
+    number = 0
+    shift = 0
+    while True:
+        if position >= len(data):
+            raise ValueError("Replay data ends part way through a length")
+        byte = data[position]
+        position += 1
+        number |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return number, position
+        shift += 7
+
+
+def replay_from_engine(engine):
+    """The replay of a game played with a GameEngine"""
+    return Replay(engine.difficulty,
+                  engine.log_base,
+                  engine.max_guesses,
+                  (engine.target_red, engine.target_green, engine.target_blue),
+                  tuple(engine.guesses))
+
+
+def encode_replay(replay):
+    """The bytes of one replay (without its length)"""
+    data = bytearray((REPLAY_VERSION,
+                      DIFFICULTY_CODES.index(replay.difficulty),
+                      replay.log_base,
+                      replay.max_guesses or UNLIMITED_GUESSES))
+    data += bytes(replay.target)
+    for guess in replay.guesses:
+        data += bytes(guess)
+    return bytes(data)
+
+
+def decode_replay(data):
+    """Turn the bytes of one replay (without its length) into a Replay"""
+    if len(data) < GUESSES_START or \
+            (len(data) - GUESSES_START) % 3 != 0:
+        raise ValueError("Not a replay: wrong length")
+    if data[0] != REPLAY_VERSION:
+        raise ValueError(f"Unknown replay version {data[0]}")
+    guesses = tuple(tuple(data[i:i + 3])
+                    for i in range(GUESSES_START, len(data), 3))
+    return Replay(DIFFICULTY_CODES[data[1]],
+                  data[2],
+                  data[3] or None,
+                  tuple(data[HEADER_LENGTH:GUESSES_START]),
+                  guesses)
+
+
+def frame(data):
+    """Put the length in front of a replay's bytes"""
+    return encode_varint(len(data)) + data
+
+
+def frame_positions(data):
+    """Where each replay is in a file's contents, in order
+        Returns a list of (start, length)
+    """
+    positions = []
+    position = 0
+    while position < len(data):
+        length, position = decode_varint(data, position)
+        if position + length > len(data):
+            raise ValueError("Replay data ends part way through a replay")
+        positions.append((position, length))
+        position += length
+    return positions
+
+
+def split_frames(data):
+    """The bytes of each replay in a file's contents, in order"""
+    data = memoryview(data)
+    for start, length in frame_positions(data):
+        yield data[start:start + length]
+
+
+def append_replays(filename, replays):
+    """Add replays to the end of a replay file (made if needed)
+        replays is a list of Replay
+    """
+    data = b"".join(frame(encode_replay(replay)) for replay in replays)
+    # One O_APPEND write, so replays from other copies of the game
+    # don't get mixed in with these
+    replay_fd = os.open(filename,
+                        os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(replay_fd, data)
+    finally:
+        os.close(replay_fd)
+
+
+def append_replay(filename, replay):
+    """Add one replay to the end of a replay file"""
+    append_replays(filename, [replay])
+
+
+def read_file(filename):
+    """The whole of a replay file, as bytes"""
+    with open(filename, "rb") as replay_file:
+        return replay_file.read()
+
+
+def read_replays(filename):
+    """Every replay in a file, as a list of Replay"""
+    return [decode_replay(data) for data in split_frames(read_file(filename))]
+
+
+def engine_for(replay):
+    """A new GameEngine set up to play a replay's game"""
+    return GameEngine(replay.difficulty,
+                      "#%02x%02x%02x" % replay.target,
+                      max_guesses=replay.max_guesses,
+                      log_base=replay.log_base)
+
+
+def replay_engine(replay):
+    """Play a replay through a GameEngine, hints and all
+        Returns the engine, with the game finished
+    """
+    engine = engine_for(replay)
+    for guess in replay.guesses:
+        engine.guess_rgb(*guess)
+    return engine
+
+
+def fast_replay(data):
+    """Play one replay straight from its bytes (without its length)
+        Returns a ReplayResult
+        Raises ValueError if there are guesses after the game ended
+    """
+    # No game can have more guesses than the replay has bytes
+    max_guesses = data[3] or len(data)
+    target_red, target_green, target_blue = data[HEADER_LENGTH:GUESSES_START]
+    score = STARTING_SCORE
+    guess_count = 0
+    won = False
+    guesses = iter(data[GUESSES_START:])
+    # Take the guesses 3 bytes at a time
+    for guess_red, guess_green, guess_blue in zip(guesses, guesses, guesses):
+        if won or guess_count >= max_guesses:
+            raise ValueError("Replay has guesses after the game ended")
+        total_error = (abs(guess_red - target_red) +
+                       abs(guess_green - target_green) +
+                       abs(guess_blue - target_blue))
+        score = SCORE_FACTORS[total_error] * score
+        guess_count += 1
+        won = total_error == 0
+    return ReplayResult(won,
+                        not won and guess_count >= max_guesses,
+                        guess_count,
+                        score_to_accuracy(score))
+
+
+def replay_file(filename):
+    """Play back every replay in a file
+        Returns a list of ReplayResult
+    """
+    return [fast_replay(data) for data in split_frames(read_file(filename))]
+
+
+def replay_file_batch(filename):
+    """Play back every replay in a file at once with NumPy (see
+        batchscorer.py), for very large files.
+        Unlike replay_file, guesses after the end of a game aren't
+        checked for.
+        Returns a ReplayResult of arrays, one value per replay
+    """
+    # Only needed here, so the game itself doesn't need NumPy
+    import numpy as np
+    from batchscorer import score_guesses
+    data = read_file(filename)
+    positions = np.array(frame_positions(data), dtype=np.int64).reshape(-1, 2)
+    starts, lengths = positions[:, 0], positions[:, 1]
+    raw = np.frombuffer(data, dtype=np.uint8)
+    max_guesses = raw[starts + 3]
+    guess_counts = (lengths - GUESSES_START) // 3
+    # Where each game's guesses start in the list of every guess
+    first_guesses = np.cumsum(guess_counts) - guess_counts
+    game_ids = np.repeat(np.arange(len(starts)), guess_counts)
+    # Which guess of its game each guess is
+    numbers = np.arange(len(game_ids)) - first_guesses[game_ids]
+    colours = np.arange(3)
+    guesses = raw[(starts[game_ids] + GUESSES_START +
+                   3 * numbers)[:, None] + colours]
+    targets = raw[(starts[game_ids] + HEADER_LENGTH)[:, None] + colours]
+    result = score_guesses(targets, guesses, game_ids)
+    # Each game's result is the one after its last guess (a game with
+    # no guesses keeps its starting score)
+    played = guess_counts > 0
+    last_guesses = np.maximum(first_guesses + guess_counts - 1, 0)
+    won = played & result.won[last_guesses]
+    accuracies = np.where(played,
+                          result.accuracies[last_guesses],
+                          score_to_accuracy(STARTING_SCORE))
+    return ReplayResult(won,
+                        ~won & (max_guesses != UNLIMITED_GUESSES) &
+                        (guess_counts >= max_guesses),
+                        guess_counts,
+                        accuracies)
+
+
+# Check and summarise a replay file, eg
+#   python replay.py replays.hxr
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python replay.py <replays.hxr>")
+    start = time.perf_counter()
+    results = replay_file(sys.argv[1])
+    seconds = time.perf_counter() - start
+    guess_count = sum(result.guess_count for result in results)
+    wins = sum(result.won for result in results)
+    print(f"{len(results)} games ({wins} won), {guess_count} guesses"
+          f" replayed in {seconds:.3f}s")
@@ -0,0 +1,256 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: High scores as an append-only log plus a snapshot
+# ======================================
+"""Every score ever submitted, kept in an append-only log.
+
+Saving a score is one small append of a JSON line to the log, eg
+    {"difficulty": "Standard", "player_name": "Jo", "score": 91.37,
+     "timestamp": 1760000000.0}
+instead of rewriting the whole high score file, and scores that don't
+make the board are still kept for later analysis.
+
+Every so often the log is compacted: the top scores are written to a
+snapshot file along with how far through the log they go. A reader
+starts from the snapshot and then only ever reads the part of the log
+it hasn't seen yet, remembering the byte offset it got to.
+
+LogScoreStore has the same methods as the stores in scorestore.py.
+
+    python scorelog.py highscores.log     (compacts the log)
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from atomicfile import atomic_write_json, file_lock
+from leaderboard import LEADERBOARD_SIZE, Leaderboard
+from scorestore import ScoreStoreError, empty_scores
+
+"""Constants."""
+
+# The snapshot's file name is the log's with this on the end
+SNAPSHOT_SUFFIX = ".snapshot.json"
+# Compact the log once this many bytes have been added since the last
+# snapshot
+COMPACT_AFTER_BYTES = 64 * 1024
+
+log = logging.getLogger(__name__)
+
+
+def snapshot_filename_for(log_filename):
+    """The name of the snapshot file that goes with a log"""
+    return os.path.splitext(log_filename)[0] + SNAPSHOT_SUFFIX
+
+
+def decode_record(line):
+    """One line of the log as a dict
+        Raises ValueError if it isn't a score (eg it was damaged when
+        the game crashed part way through writing it)
+    """
+    try:
+        record = json.loads(line)
+        score = record["score"]
+        if not isinstance(record["difficulty"], str) or \
+                not isinstance(record["player_name"], str) or \
+                isinstance(score, bool) or \
+                not isinstance(score, (int, float)):
+            raise ValueError("not a score")
+    except (KeyError, TypeError, ValueError) as e:
+        # json.JSONDecodeError and UnicodeDecodeError are ValueErrors
+        raise ValueError(f"{type(e).__name__}: {e}") from e
+    return record
+
+
+class LogScoreStore:
+    """The high scores as an append-only log and a top scores snapshot"""
+
+    def __init__(self, log_filename, size=LEADERBOARD_SIZE, sizes=None):
+        """log_filename is text, preferably from constants
+            size is how many scores to show for each difficulty
+            sizes is a dict of difficulty: size, for any difficulties
+             that show a different number of scores
+        """
+        self.log_filename = log_filename
+        self.snapshot_filename = snapshot_filename_for(log_filename)
+        self.size = size
+        self.sizes = sizes
+        # Only one thread reads the log at a time
+        self.read_lock = threading.Lock()
+        self.board, self.offset = self.read_snapshot()
+        # Whether the log ended part way through a line when it was
+        # last read
+        self.partial_line = False
+        # How far through the log the snapshot on disk goes
+        self.snapshot_offset = self.offset
+
+    def read_snapshot(self):
+        """Load the snapshot, if there is one
+            Returns (Leaderboard, how far through the log it goes)
+        """
+        try:
+            with open(self.snapshot_filename, "r") as snapshot_file:
+                snapshot = json.load(snapshot_file)
+        except FileNotFoundError:
+            snapshot = {"log_offset": 0, "scores": empty_scores()}
+        except (IOError, json.JSONDecodeError) as e:
+            raise ScoreStoreError(
+                f"Could not read {self.snapshot_filename}: {e}") from e
+        try:
+            board = Leaderboard.from_dict(snapshot["scores"],
+                                          self.size,
+                                          self.sizes)
+            return board, int(snapshot["log_offset"])
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise ScoreStoreError(
+                f"{self.snapshot_filename} is damaged: {e!r}") from e
+
+    def catch_up(self):
+        """Add any scores appended to the log since it was last read.
+            Only whole lines are read, a line still being written is
+            picked up next time. A whole line that isn't a score is
+            logged and skipped, so it can't stop the rest being read.
+        """
+        with self.read_lock:
+            try:
+                with open(self.log_filename, "rb") as log_file:
+                    log_file.seek(self.offset)
+                    new_data = log_file.read()
+            except FileNotFoundError:
+                return
+            except IOError as e:
+                raise ScoreStoreError(
+                    f"Could not read {self.log_filename}: {e}") from e
+            end = new_data.rfind(b"\n") + 1
+            self.partial_line = end < len(new_data)
+            for line in new_data[:end].splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    record = decode_record(line)
+                except ValueError as e:
+                    log.warning("Skipping a damaged line in %s: %s",
+                                self.log_filename, e)
+                    continue
+                self.board.add(record["difficulty"],
+                               record["player_name"],
+                               record["score"])
+            self.offset += end
+
+    def all_scores(self):
+        """The top scores for every difficulty"""
+        self.catch_up()
+        return self.board.to_dict()
+
+    def top_scores(self, difficulty, count=None):
+        """The best scores for a difficulty, best first"""
+        self.catch_up()
+        return self.board.top(difficulty, count)
+
+    def lowest_score(self, difficulty):
+        """The score to beat to get on the board (0 if it isn't full)"""
+        self.catch_up()
+        return self.board.floor(difficulty)
+
+    def rank(self, difficulty, score):
+        """Where a score would be placed for a difficulty (1 is top)"""
+        self.catch_up()
+        return self.board.rank(difficulty, score)
+
+    def add_score(self, difficulty, player_name, score):
+        """Add one score
+            Returns False if the score doesn't make the board (it is
+            still kept in the log)
+        """
+        return self.add_scores([(difficulty, player_name, score)])[0]
+
+    def add_scores(self, entries):
+        """Append scores to the log in one write
+            entries is a list of (difficulty, player_name, score)
+            Returns a list saying whether each one made the board
+        """
+        self.catch_up()
+        # Each score is checked against the board with the ones before
+        # it in the batch already on, as the other stores do
+        trial_board = Leaderboard.from_dict(self.board.to_dict(),
+                                            self.size,
+                                            self.sizes)
+        made_board = [trial_board.add(difficulty, player_name, score)
+                      for difficulty, player_name, score in entries]
+        now = time.time()
+        lines = b"".join(
+            json.dumps({"difficulty": difficulty,
+                        "player_name": player_name,
+                        "score": score,
+                        "timestamp": now},
+                       separators=(",", ":")).encode("utf-8") + b"\n"
+            for difficulty, player_name, score in entries)
+        if self.partial_line:
+            # A game that crashed part way through writing a line left
+            # it unfinished, so end it rather than add to it
+            lines = b"\n" + lines
+        try:
+            # O_APPEND makes each write land at the end of the file,
+            # even with other copies of the game appending too
+            log_fd = os.open(self.log_filename,
+                             os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                             0o644)
+            try:
+                os.write(log_fd, lines)
+                os.fsync(log_fd)
+            finally:
+                os.close(log_fd)
+        except OSError as e:
+            raise ScoreStoreError(f"Could not save the score: {e}") from e
+        self.catch_up()
+        if self.offset - self.snapshot_offset >= COMPACT_AFTER_BYTES:
+            self.compact()
+        return made_board
+
+    def compact(self):
+        """Write the top scores so far to the snapshot, so new readers
+            can start from there instead of the beginning of the log
+        """
+        with file_lock(self.snapshot_filename):
+            self.catch_up()
+            # Another copy of the game may already have done it
+            _, snapshot_offset = self.read_snapshot()
+            if snapshot_offset < self.offset:
+                atomic_write_json(self.snapshot_filename,
+                                  {"log_offset": self.offset,
+                                   "scores": self.board.to_dict()})
+                snapshot_offset = self.offset
+            self.snapshot_offset = snapshot_offset
+
+    def history(self):
+        """Every score ever submitted, oldest first, as dicts with
+            difficulty, player_name, score and timestamp
+        """
+        try:
+            with open(self.log_filename, "rb") as log_file:
+                for line in log_file:
+                    if not line.endswith(b"\n") or not line.strip():
+                        continue
+                    try:
+                        yield decode_record(line)
+                    except ValueError as e:
+                        log.warning("Skipping a damaged line in %s: %s",
+                                    self.log_filename, e)
+        except FileNotFoundError:
+            return
+        except IOError as e:
+            raise ScoreStoreError(
+                f"Could not read {self.log_filename}: {e}") from e
+
+
+# Compact a log, eg
+#   python scorelog.py highscores.log
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python scorelog.py <scores.log>")
+    store = LogScoreStore(sys.argv[1])
+    store.compact()
+    print(f"Compacted {sys.argv[1]} up to byte {store.offset}")
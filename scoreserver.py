@@ -0,0 +1,207 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: A leaderboard server that several copies of the game share
+# ======================================
+"""A small asyncio leaderboard server, so every site shares one ranking.
+
+It keeps the scores in any of the stores in scorestore.py and talks
+line delimited JSON over TCP: each request is one line, eg
+    {"id": 7, "op": "top", "difficulty": "Standard", "count": 3}
+and is answered by one line, in the order the requests came in
+    {"id": 7, "ok": true, "result": [...]}
+    {"id": 8, "ok": false, "error": "..."}
+so a client can keep a connection open and send several requests before
+reading the answers (see remotescores.py).
+
+The operations are
+    all                        every difficulty's top scores
+    top     difficulty, count  the best scores for a difficulty
+    lowest  difficulty         the score to beat
+    rank    difficulty, score  where a score would be placed
+    submit  submission         a score and its replay (see verify.py),
+                               only saved if the replay matches, and
+                               only once however often it is sent -
+                               the same replay sent with a different
+                               name or score is turned away
+    ping                       check the server is there
+
+It only needs the standard library, so it can be run next to the game:
+
+    python scoreserver.py --store highscores.json --port 8765
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from scorestore import open_score_store
+from verify import (add_verified_scores, claim_id, submission_from_json,
+                    submission_id)
+
+"""Constants."""
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# The longest request line allowed, in bytes
+MAX_LINE_LENGTH = 64 * 1024
+# Added to the store's filename for the file of submissions already
+# stored
+SUBMITTED_SUFFIX = ".submitted"
+
+
+def encode_message(message):
+    """One message as a line of JSON, as bytes"""
+    return json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class ScoreServer:
+    """Answers leaderboard requests from the game's clients"""
+
+    def __init__(self, store, submitted_filename=None):
+        """store is one of the stores in scorestore.py
+            submitted_filename is where to keep the games already
+             stored, one "<game id> <claim id>" line each (see
+             verify.submission_id and verify.claim_id), or None to only
+             remember them while running
+        """
+        self.store = store
+        # A client that loses the answer to a submit sends it again, so
+        # each game's score is only stored the first time.
+        # {game id: the claim id of the submission that stored it}
+        self.submitted_filename = submitted_filename
+        self.submitted = {}
+        if submitted_filename is not None:
+            try:
+                with open(submitted_filename, "r") as submitted_file:
+                    for line in submitted_file:
+                        game_id, _, this_claim = line.strip().partition(" ")
+                        if game_id:
+                            self.submitted[game_id] = this_claim
+            except FileNotFoundError:
+                pass
+        # The stores do blocking file I/O, so they're used from one
+        # thread of their own, one request at a time, to keep the event
+        # loop free for the network
+        self.executor = ThreadPoolExecutor(max_workers=1,
+                                           thread_name_prefix="ScoreStore")
+        self.operations = {
+            "all": lambda request: self.store.all_scores(),
+            "top": lambda request: self.store.top_scores(
+                request["difficulty"], request.get("count")),
+            "lowest": lambda request: self.store.lowest_score(
+                request["difficulty"]),
+            "rank": lambda request: self.store.rank(
+                request["difficulty"], request["score"]),
+            "submit": lambda request: self.submit(
+                submission_from_json(request["submission"])),
+            "ping": lambda request: True,
+        }
+
+    def submit(self, submission):
+        """Check and store a submission, unless its game already has been
+            Returns whether it passed. A game that's already stored gets
+             the answer it got the first time if it's sent again as it
+             was, but a different name or score with the same replay is
+             turned away, since that game is already on the board
+        """
+        game_id = submission_id(submission)
+        this_claim = claim_id(submission)
+        if game_id in self.submitted:
+            return self.submitted[game_id] == this_claim
+        passed = add_verified_scores(self.store, [submission])[0]
+        if passed:
+            self.submitted[game_id] = this_claim
+            if self.submitted_filename is not None:
+                submitted_fd = os.open(self.submitted_filename,
+                                       os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+                                       0o644)
+                try:
+                    os.write(submitted_fd,
+                             f"{game_id} {this_claim}\n".encode("ascii"))
+                    os.fsync(submitted_fd)
+                finally:
+                    os.close(submitted_fd)
+        return passed
+
+    def run_request(self, request):
+        """Carry out one request (on the store's thread)
+            Returns the response to send back
+        """
+        response = {"id": request.get("id")}
+        try:
+            operation = self.operations[request["op"]]
+        except KeyError:
+            response.update(ok=False,
+                            error=f"Unknown operation {request.get('op')!r}")
+            return response
+        try:
+            response.update(ok=True, result=operation(request))
+        except (KeyError, TypeError, ValueError, IOError) as e:
+            response.update(ok=False, error=f"{type(e).__name__}: {e}")
+        return response
+
+    async def handle_client(self, reader, writer):
+        """Answer one client's requests, in order, until it hangs up"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # Line too long
+                    writer.write(encode_message(
+                        {"id": None, "ok": False,
+                         "error": "Request too long"}))
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("not an object")
+                except ValueError as e:
+                    response = {"id": None, "ok": False,
+                                "error": f"Bad request: {e}"}
+                else:
+                    response = await loop.run_in_executor(
+                        self.executor, self.run_request, request)
+                writer.write(encode_message(response))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Accept clients until cancelled"""
+        server = await asyncio.start_server(self.handle_client,
+                                            host,
+                                            port,
+                                            limit=MAX_LINE_LENGTH)
+        addresses = ", ".join(str(sock.getsockname())
+                              for sock in server.sockets)
+        print(f"Serving high scores on {addresses}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(
+        description="Run a shared HexaGuessa leaderboard")
+    parser.add_argument("--store", default="highscores.json",
+                        help="high score file to keep the scores in")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+    server = ScoreServer(open_score_store(args.store),
+                         args.store + SUBMITTED_SUFFIX)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
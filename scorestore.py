@@ -0,0 +1,397 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: Where the high scores are kept
+# ======================================
+"""High score storage.
+
+Every store has the same methods, so the screens don't need to know
+how the scores are kept:
+    all_scores()                       {difficulty: [entry, ...]}
+    top_scores(difficulty, count)      [entry, ...], best first
+    lowest_score(difficulty)           the score to beat to get on the
+                                        board (0 if it isn't full)
+    rank(difficulty, score)            where a score would be placed
+                                        on the board
+    add_score(difficulty, player_name, score)
+                                       whether it made the board
+    add_scores([(difficulty, player_name, score), ...])
+                                       [whether each made the board]
+where an entry is {"player_name": ..., "score": ...}.
+
+JsonScoreStore is the original highscores.json file.
+SqliteScoreStore keeps every score in an SQLite database, indexed so a
+new score doesn't mean rewriting all the others.
+MmapScoreStore (in mmapscores.py) keeps fixed size records in a memory
+mapped file.
+LogScoreStore (in scorelog.py) appends every score to a log and keeps
+the top scores in a snapshot.
+RemoteScoreStore (in remotescores.py) uses a shared score server.
+open_score_store picks one from the file name.
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+from atomicfile import atomic_write_json, file_lock
+from gameengine import DIFFICULTY_EXPERT, DIFFICULTY_STANDARD
+from leaderboard import LEADERBOARD_SIZE, Leaderboard
+
+"""Constants."""
+
+# File name endings that mean an SQLite database rather than JSON
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+# File name endings that mean a memory mapped score file
+MMAP_EXTENSIONS = (".hxs",)
+# File name endings that mean an append-only score log
+LOG_EXTENSIONS = (".log",)
+# What a score server's address starts with, instead of a file name
+REMOTE_PREFIX = "tcp://"
+
+
+class ScoreStoreError(IOError):
+    """Something went wrong reading or writing the high scores.
+        It is an IOError, so the screens' existing file error handling
+        covers every kind of store.
+    """
+
+
+def empty_scores():
+    """The high scores when there aren't any yet"""
+    return {
+        DIFFICULTY_STANDARD: [],
+        DIFFICULTY_EXPERT: []
+    }
+
+
+class JsonScoreStore:
+    """The high scores as one JSON file, which is rewritten in full
+        for every new score that makes the board.
+        The file is only parsed again when its modification time or
+        size changes (eg another copy of the game saved a score), so
+        one store can be shared by every screen.
+        Several copies of the game can share the file: writers take
+        turns using a lock file, and the file is replaced in one go
+        (see atomicfile.py) so it is never left half written.
+    """
+
+    def __init__(self, filename, size=LEADERBOARD_SIZE, sizes=None):
+        """filename is text, preferably from constants
+            size is how many scores to keep for each difficulty
+            sizes is a dict of difficulty: size, for any difficulties
+             that keep a different number of scores
+        """
+        self.filename = filename
+        self.size = size
+        self.sizes = sizes
+        # The last scores read or written (as a Leaderboard), and the
+        # (mtime, size, inode) of the file at the time. If it couldn't
+        # be decoded the error is kept instead, so it isn't parsed again
+        # until it changes.
+        self.cached_board = None
+        self.cached_error = None
+        self.cached_stamp = None
+        # Scores waiting to be written. Whoever gets to write next
+        # writes all of them, so scores that arrive while the file is
+        # locked are saved together.
+        self.pending = []
+        self.pending_lock = threading.Lock()
+        # Only one thread in this process writes at a time
+        self.write_lock = threading.Lock()
+
+    def file_stamp(self):
+        """The file's (modification time, size, inode), to tell if it
+            changed. The inode changes every time the file is replaced,
+            even if the new one is the same size and written within
+            the same clock tick.
+            Raises FileNotFoundError if there isn't one
+        """
+        file_status = os.stat(self.filename)
+        return (file_status.st_mtime_ns,
+                file_status.st_size,
+                file_status.st_ino)
+
+    def load(self):
+        """Load scores from the high score JSON file, as a Leaderboard
+            Raises FileNotFoundError if there isn't one,
+            json.JSONDecodeError if it is garbage, and ScoreStoreError
+            if it is JSON but not high scores
+        """
+        stamp = self.file_stamp()
+        if stamp != self.cached_stamp:
+            self.cached_board = None
+            self.cached_error = None
+            try:
+                with open(self.filename, "r") as high_score_file:
+                    self.cached_board = Leaderboard.from_dict(
+                        json.load(high_score_file), self.size, self.sizes)
+            except json.JSONDecodeError as e:
+                self.cached_error = e
+            except (AttributeError, KeyError, TypeError) as e:
+                self.cached_error = ScoreStoreError(
+                    f"{self.filename} is not a high score file: {e!r}")
+            self.cached_stamp = stamp
+        if self.cached_error is not None:
+            raise self.cached_error
+        return self.cached_board
+
+    def all_scores(self):
+        """Load scores from the high score JSON file
+            Raises FileNotFoundError if there isn't one,
+            json.JSONDecodeError if it is garbage, and ScoreStoreError
+            if it is JSON but not high scores
+        """
+        return self.load().to_dict()
+
+    def read_board(self):
+        """Load scores from the high score JSON file, or empty scores
+            if it is missing or garbage
+        """
+        try:
+            return self.load()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return Leaderboard.from_dict(empty_scores(),
+                                         self.size,
+                                         self.sizes)
+
+    def top_scores(self, difficulty, count=None):
+        """The best scores for a difficulty, best first"""
+        return self.read_board().top(difficulty, count)
+
+    def lowest_score(self, difficulty):
+        """Find the lowest score for the difficult - used to determine
+            whether a winning game is good enough to make the charts
+        """
+        return self.read_board().floor(difficulty)
+
+    def rank(self, difficulty, score):
+        """Where a score would be placed for a difficulty (1 is top)"""
+        return self.read_board().rank(difficulty, score)
+
+    def add_score(self, difficulty, player_name, score):
+        """Update the JSON file with new player's data.
+            Returns False if the score doesn't make the board
+        """
+        return self.add_scores([(difficulty, player_name, score)])[0]
+
+    def add_scores(self, entries):
+        """Add lots of scores with one write
+            entries is a list of (difficulty, player_name, score)
+            Returns a list saying whether each one made the board
+        """
+        # [difficulty, player_name, score, made the board]
+        submissions = [[difficulty, player_name, score, None]
+                       for difficulty, player_name, score in entries]
+        with self.pending_lock:
+            self.pending.extend(submissions)
+        with self.write_lock:
+            # Another thread may have written ours along with its own
+            # while we were waiting
+            if submissions[-1][3] is None:
+                self.write_pending()
+        return [submission[3] for submission in submissions]
+
+    def write_pending(self):
+        """Write every waiting score to the file, holding the lock so
+            no other process writes at the same time
+        """
+        with file_lock(self.filename):
+            with self.pending_lock:
+                batch = self.pending
+                self.pending = []
+            # Read the file now we hold the lock, in case another copy
+            # of the game has saved a score since we last looked
+            board = self.read_board()
+            for submission in batch:
+                submission[3] = board.add(*submission[:3])
+            if not any(submission[3] for submission in batch):
+                return
+            try:
+                # Save back to JSON file
+                atomic_write_json(self.filename, board.to_dict())
+            except IOError:
+                # The cached board has the new scores but the file
+                # doesn't, so read the file again next time
+                self.cached_stamp = None
+                raise
+            # We know what's in the file now, so there's no need to
+            # read it
+            self.cached_board = board
+            self.cached_error = None
+            self.cached_stamp = self.file_stamp()
+
+
+class SqliteScoreStore:
+    """The high scores in an SQLite database.
+        Every score is kept, and the index on (difficulty, score) means
+        adding one is O(log n) and the top scores and ranks are read
+        straight off the index.
+    """
+
+    def __init__(self, filename, size=LEADERBOARD_SIZE, sizes=None):
+        """filename is text, preferably from constants
+            size is how many scores to show for each difficulty
+            sizes is a dict of difficulty: size, for any difficulties
+             that show a different number of scores
+        """
+        self.filename = filename
+        self.size = size
+        self.sizes = dict(sizes or {})
+        try:
+            # The game uses the store from a background thread
+            self.connection = sqlite3.connect(filename,
+                                              check_same_thread=False)
+            # WAL lets the leaderboard be read while a score is written
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            with self.connection:
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS scores ("
+                    " id INTEGER PRIMARY KEY,"
+                    " difficulty TEXT NOT NULL,"
+                    " player_name TEXT NOT NULL,"
+                    " score REAL NOT NULL)")
+                self.connection.execute(
+                    "CREATE INDEX IF NOT EXISTS scores_by_difficulty"
+                    " ON scores (difficulty, score DESC)")
+        except sqlite3.Error as e:
+            raise ScoreStoreError(f"Could not open {filename}: {e}") from e
+
+    def close(self):
+        """Close the database"""
+        self.connection.close()
+
+    def query(self, sql, parameters=()):
+        """Run a query and return all the rows"""
+        try:
+            return self.connection.execute(sql, parameters).fetchall()
+        except sqlite3.Error as e:
+            raise ScoreStoreError(f"High score query failed: {e}") from e
+
+    def all_scores(self):
+        """The top scores for every difficulty"""
+        all_scores = empty_scores()
+        for (difficulty,) in self.query(
+                "SELECT DISTINCT difficulty FROM scores"):
+            all_scores[difficulty] = self.top_scores(difficulty)
+        return all_scores
+
+    def top_scores(self, difficulty, count=None):
+        """The best scores for a difficulty, best first.
+            Equal scores are kept in the order they were added.
+        """
+        rows = self.query("SELECT player_name, score FROM scores"
+                          " WHERE difficulty = ?"
+                          " ORDER BY score DESC, id LIMIT ?",
+                          (difficulty,
+                           count or self.sizes.get(difficulty, self.size)))
+        return [{"player_name": player_name, "score": score}
+                for player_name, score in rows]
+
+    def lowest_score(self, difficulty):
+        """The score to beat to get on the board (0 if it isn't full)"""
+        rows = self.query("SELECT score FROM scores"
+                          " WHERE difficulty = ?"
+                          " ORDER BY score DESC, id LIMIT 1 OFFSET ?",
+                          (difficulty,
+                           self.sizes.get(difficulty, self.size) - 1))
+        if not rows:
+            return 0
+        return rows[0][0]
+
+    def rank(self, difficulty, score):
+        """Where a score would be placed for a difficulty (1 is top),
+            counting only the scores on the board, like the other stores
+        """
+        size = self.sizes.get(difficulty, self.size)
+        rows = self.query("SELECT COUNT(*) FROM"
+                          " (SELECT 1 FROM scores"
+                          "  WHERE difficulty = ? AND score > ? LIMIT ?)",
+                          (difficulty, score, size))
+        return rows[0][0] + 1
+
+    def add_score(self, difficulty, player_name, score):
+        """Add one score
+            Returns False if the score doesn't make the board (it is
+            still kept)
+        """
+        return self.add_scores([(difficulty, player_name, score)])[0]
+
+    def add_scores(self, entries):
+        """Add lots of scores in one transaction
+            entries is a list of (difficulty, player_name, score)
+            Returns a list saying whether each one made the board
+        """
+        made_board = []
+        try:
+            with self.connection:
+                for difficulty, player_name, score in entries:
+                    # The score to beat is the last one on the board,
+                    # read off the index before this one goes in
+                    floor = self.connection.execute(
+                        "SELECT score FROM scores WHERE difficulty = ?"
+                        " ORDER BY score DESC, id LIMIT 1 OFFSET ?",
+                        (difficulty,
+                         self.sizes.get(difficulty, self.size) - 1)
+                    ).fetchone()
+                    made_board.append(floor is None or score > floor[0])
+                    self.connection.execute(
+                        "INSERT INTO scores (difficulty, player_name, score)"
+                        " VALUES (?, ?, ?)",
+                        (difficulty, player_name, score))
+        except sqlite3.Error as e:
+            raise ScoreStoreError(f"Could not save the score: {e}") from e
+        return made_board
+
+
+def open_score_store(filename, size=LEADERBOARD_SIZE, sizes=None):
+    """Open the right kind of store for a high score file
+        filename is text, preferably from constants, or a score
+         server's address, eg tcp://scores.example.com:8765
+        size is how many scores to show for each difficulty
+        sizes is a dict of difficulty: size, for any difficulties
+         that show a different number of scores
+    """
+    if filename.lower().startswith(REMOTE_PREFIX):
+        # Imported here, since remotescores uses this module
+        from remotescores import RemoteScoreStore
+        return RemoteScoreStore(filename, size, sizes)
+    if filename.lower().endswith(SQLITE_EXTENSIONS):
+        return SqliteScoreStore(filename, size, sizes)
+    if filename.lower().endswith(MMAP_EXTENSIONS):
+        # Imported here, since mmapscores uses this module
+        from mmapscores import MmapScoreStore
+        return MmapScoreStore(filename, size, sizes)
+    if filename.lower().endswith(LOG_EXTENSIONS):
+        # Imported here, since scorelog uses this module
+        from scorelog import LogScoreStore
+        return LogScoreStore(filename, size, sizes)
+    return JsonScoreStore(filename, size, sizes)
+
+
+def import_json_scores(json_filename, store):
+    """Copy every score in a high score JSON file into another store
+        Returns how many scores were copied
+    """
+    with open(json_filename, "r") as high_score_file:
+        all_scores = json.load(high_score_file)
+    entries = [(difficulty, entry["player_name"], entry["score"])
+               for difficulty, scores in all_scores.items()
+               for entry in scores]
+    if hasattr(store, "add_scores"):
+        store.add_scores(entries)
+    else:
+        for entry in entries:
+            store.add_score(*entry)
+    return len(entries)
+
+
+# Import an existing JSON file, eg
+#   python scorestore.py highscores.json highscores.db
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python scorestore.py <from.json> <to.db>")
+    if os.path.exists(sys.argv[2]):
+        print(f"Adding to the scores already in {sys.argv[2]}")
+    copied = import_json_scores(sys.argv[1], open_score_store(sys.argv[2]))
+    print(f"Copied {copied} scores to {sys.argv[2]}")
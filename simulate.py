@@ -0,0 +1,194 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: Play lots of bot games to tune the game settings
+# ======================================
+"""Monte Carlo sweep of the game settings.
+
+Plays bot games (standardsolver / expertsolver) over a grid of log base
+(ERR_INDICATOR_DIFFICULTY), MAX_ALLOWED_GUESSES and difficulty settings,
+spread across a process pool, and writes one JSON line per setting with
+the win rate and the accuracy distribution.
+
+The bots never look at how many guesses are left, so each game is only
+played once, to the end, and the result is then counted against every
+max guesses value. Expert hints don't use the log base, so Expert games
+are only played once and written with a log base of null.
+
+    python simulate.py --games 1000000 --log-bases 2 3 4 --max-guesses 6 8
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+from gameengine import (DIFFICULTY_EXPERT, DIFFICULTY_STANDARD,
+                        ERR_INDICATOR_DIFFICULTY, MAX_ALLOWED_GUESSES,
+                        GameEngine, random_target)
+
+"""Constants."""
+
+# The most guesses a bot game is allowed, it should never get near this
+BOT_GUESS_LIMIT = 64
+# How many games each worker plays at a time
+DEFAULT_CHUNK_SIZE = 5000
+# Where the results go
+DEFAULT_OUTPUT_FILE = "simulation_results.jsonl"
+
+
+def play_chunk(task):
+    """Play a chunk of bot games in a worker process.
+        task is (difficulty, log_base, number of games, random seed)
+        Returns the task's difficulty and log_base, and a Counter of
+         (guesses taken, accuracy) for every game played
+    """
+    difficulty, log_base, games, seed = task
+    rng = random.Random(seed)
+    # Only import the solver that is needed, the Expert one needs NumPy
+    if difficulty == DIFFICULTY_EXPERT:
+        from expertsolver import ExpertSolver, play_game
+        solver = ExpertSolver()
+    else:
+        from standardsolver import StandardSolver, play_game
+        solver = StandardSolver(log_base)
+    results = Counter()
+    for _ in range(games):
+        engine = GameEngine(difficulty,
+                            target_colour=random_target(rng),
+                            max_guesses=BOT_GUESS_LIMIT,
+                            log_base=log_base or ERR_INDICATOR_DIFFICULTY)
+        play_game(engine, solver)
+        if not engine.won:
+            raise RuntimeError(f"The bot couldn't find {engine.target_colour}")
+        results[(engine.guess_count, engine.accuracy)] += 1
+    return difficulty, log_base, results
+
+
+def make_tasks(games, log_bases, difficulties, chunk_size, seed):
+    """Split every setting's games into chunks for the workers
+        Returns a list of tasks (see play_chunk)
+    """
+    tasks = []
+    chunk_number = 0
+    for difficulty in difficulties:
+        # Expert mode doesn't use the log base, so only play it once
+        if difficulty == DIFFICULTY_EXPERT:
+            bases = [None]
+        else:
+            bases = log_bases
+        for log_base in bases:
+            for start in range(0, games, chunk_size):
+                tasks.append((difficulty,
+                              log_base,
+                              min(chunk_size, games - start),
+                              seed + chunk_number))
+                chunk_number += 1
+    return tasks
+
+
+def summarise(difficulty, log_base, max_guesses, results):
+    """Turn the (guesses, accuracy) counts for one difficulty and log
+        base into the result for one max guesses setting (a dict)
+    """
+    games = sum(results.values())
+    guess_counts = Counter()
+    accuracy_counts = Counter()
+    for (guesses, accuracy), count in results.items():
+        guess_counts[guesses] += count
+        if guesses <= max_guesses:
+            accuracy_counts[accuracy] += count
+    wins = sum(accuracy_counts.values())
+    total_accuracy = sum(accuracy * count
+                         for accuracy, count in accuracy_counts.items())
+    return {
+        "difficulty": difficulty,
+        "log_base": log_base,
+        "max_guesses": max_guesses,
+        "games": games,
+        "wins": wins,
+        "win_rate": wins / games if games else 0,
+        "mean_accuracy": total_accuracy / wins if wins else 0,
+        # JSON keys have to be strings
+        "guess_counts": {str(guesses): count for guesses, count
+                         in sorted(guess_counts.items())},
+        "accuracy_counts": {str(accuracy): count for accuracy, count
+                            in sorted(accuracy_counts.items())},
+    }
+
+
+def run_sweep(games,
+              log_bases,
+              max_guesses_list,
+              difficulties,
+              output_file,
+              workers=None,
+              chunk_size=DEFAULT_CHUNK_SIZE,
+              seed=0):
+    """Play every setting and write the results to output_file as they
+        finish, one JSON line per (difficulty, log base, max guesses)
+        workers is the number of processes, None for one per core
+    """
+    tasks = make_tasks(games, log_bases, difficulties, chunk_size, seed)
+    chunks_left = Counter((task[0], task[1]) for task in tasks)
+    results = {}
+    with Pool(workers) as pool, open(output_file, "w") as output:
+        for difficulty, log_base, chunk_results in \
+                pool.imap_unordered(play_chunk, tasks):
+            key = (difficulty, log_base)
+            results.setdefault(key, Counter()).update(chunk_results)
+            chunks_left[key] -= 1
+            if chunks_left[key]:
+                continue
+            # That setting is finished, so write it out straight away
+            for max_guesses in max_guesses_list:
+                summary = summarise(difficulty, log_base, max_guesses,
+                                    results[key])
+                output.write(json.dumps(summary) + "\n")
+                print(f"{difficulty} log base {log_base}"
+                      f" max guesses {max_guesses}:"
+                      f" win rate {summary['win_rate']:.4%},"
+                      f" mean accuracy {summary['mean_accuracy']:.2f}",
+                      file=sys.stderr)
+            output.flush()
+            del results[key]
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(
+        description="Play bot games to tune the HexaGuessa settings")
+    parser.add_argument("--games", type=int, default=100000,
+                        help="games to play for each setting")
+    parser.add_argument("--log-bases", type=int, nargs="+",
+                        default=[ERR_INDICATOR_DIFFICULTY],
+                        help="ERR_INDICATOR_DIFFICULTY values to try")
+    parser.add_argument("--max-guesses", type=int, nargs="+",
+                        default=[MAX_ALLOWED_GUESSES],
+                        help="MAX_ALLOWED_GUESSES values to try")
+    parser.add_argument("--difficulties", nargs="+",
+                        default=[DIFFICULTY_STANDARD, DIFFICULTY_EXPERT],
+                        choices=[DIFFICULTY_STANDARD, DIFFICULTY_EXPERT])
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int,
+                        default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_FILE)
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    run_sweep(args.games,
+              args.log_bases,
+              args.max_guesses,
+              args.difficulties,
+              args.output,
+              workers=args.workers,
+              chunk_size=args.chunk_size,
+              seed=args.seed)
+    print(f"Finished in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
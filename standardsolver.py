@@ -0,0 +1,240 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: A reference bot for Standard mode
+# ======================================
+"""Plays Standard mode as well as it can be played.
+
+Each Standard hint says the difference between the guess and the
+target is inside a known band (see hinttable.py), so every colour's
+possible targets are always one interval. The solver keeps that
+interval per colour and narrows it with each hint.
+
+How best to split an interval only depends on its size, so the best
+guess for every size is worked out once per log base:
+ - first the fewest guesses that always find the colour (worst case)
+ - then, out of the guesses that keep that guarantee, the one with the
+   fewest guesses on average.
+The three colours are chosen independently, which is exact for the
+worst case and a close approximation for the expected game length
+(the game lasts as long as the slowest colour).
+"""
+from gameengine import (DIFFICULTY_STANDARD, ERR_INDICATOR_DIFFICULTY,
+                        MAX_ALLOWED_GUESSES, GameEngine)
+from hinttable import MAX_DIFF, get_hint_table
+
+"""Constants."""
+
+# The number of values each colour can take, ie 0x00 to 0xFF
+CHANNEL_SIZE = MAX_DIFF + 1
+
+
+def hint_bands(log_base):
+    """Works out which differences (guess - target) give each hint.
+        Returns a dict of margin: (lowest diff, highest diff)
+        log_base is the error margin indicator difficulty (2+)
+    """
+    bands = {}
+    for diff, margin in enumerate(get_hint_table(log_base).margins,
+                                  -MAX_DIFF):
+        low, high = bands.get(margin, (diff, diff))
+        bands[margin] = (min(low, diff), max(high, diff))
+    # The hints only make sense if each one is one unbroken range,
+    # otherwise the possible targets wouldn't stay an interval
+    if sum(high - low + 1 for low, high in bands.values()) != 2*MAX_DIFF+1:
+        raise ValueError(f"The hints for log base {log_base}"
+                         " are not contiguous")
+    return bands
+
+
+class StrategyTable:
+    """
+        The best guess for every interval size, for one log base.
+        best_offset[n] is how far into an interval of n possible values
+         to guess
+        worst_case[n] is the most guesses needed for that interval
+        expected[n] is the average guesses needed for that interval
+        guess_odds[n][k] is the chance it takes exactly k guesses
+    """
+
+    def __init__(self, log_base):
+        """log_base is the error margin indicator difficulty (2+)"""
+        self.log_base = log_base
+        self.bands = hint_bands(log_base)
+        # Only the "wrong" bands split the interval, a diff of 0 is a hit
+        wrong_bands = [band for margin, band in self.bands.items()
+                       if margin != 0]
+        self.best_offset = [0] * (CHANNEL_SIZE + 1)
+        self.worst_case = [0] * (CHANNEL_SIZE + 1)
+        self.expected = [0.0] * (CHANNEL_SIZE + 1)
+        for size in range(1, CHANNEL_SIZE + 1):
+            # The hints are symmetrical, so only the first half of the
+            # interval needs checking
+            choices = []
+            for offset in range((size + 1) // 2):
+                pieces = self.split(wrong_bands, size, offset)
+                worst = 1 + max((self.worst_case[piece] for piece in pieces),
+                                default=0)
+                average = 1 + sum(piece * self.expected[piece]
+                                  for piece in pieces) / size
+                choices.append((worst, average, offset))
+            worst, average, offset = min(choices)
+            self.worst_case[size] = worst
+            self.expected[size] = average
+            self.best_offset[size] = offset
+        # How likely each number of guesses is, following the strategy
+        self.guess_odds = [[], [0.0, 1.0]]
+        for size in range(2, CHANNEL_SIZE + 1):
+            odds = [0.0] * (self.worst_case[size] + 1)
+            odds[1] = 1 / size
+            for piece in self.split(wrong_bands, size,
+                                    self.best_offset[size]):
+                for guesses, chance in enumerate(self.guess_odds[piece]):
+                    odds[guesses + 1] += chance * piece / size
+            self.guess_odds.append(odds)
+
+    def split(self, wrong_bands, size, offset):
+        """The sizes of the intervals left after each wrong hint
+            size is how many values the interval holds
+            offset is how far into the interval the guess is
+        """
+        pieces = []
+        # The target is offset - diff, for a diff in the band, and must
+        # stay inside 0 to size - 1
+        for low, high in wrong_bands:
+            piece = min(high, offset) - max(low, offset - size + 1) + 1
+            if piece > 0:
+                pieces.append(piece)
+        return pieces
+
+    def chance_within(self, size, guesses):
+        """The chance an interval is found in at most this many guesses
+            size is how many values the interval holds
+        """
+        return sum(self.guess_odds[size][:guesses + 1])
+
+
+# Working out a StrategyTable takes a moment, so keep each one
+_strategy_tables = {}
+
+
+def get_strategy_table(log_base=ERR_INDICATOR_DIFFICULTY):
+    """Get the (cached) StrategyTable for a log base"""
+    table = _strategy_tables.get(log_base)
+    if table is None:
+        table = StrategyTable(log_base)
+        _strategy_tables[log_base] = table
+    return table
+
+
+class StandardSolver:
+    """
+        Keeps track of the possible target for each colour and picks
+        the next guess. Use it with a GameEngine:
+            guess = solver.next_guess()
+            result = engine.guess_rgb(*guess)
+            solver.update(guess, result.margins)
+    """
+
+    def __init__(self, log_base=ERR_INDICATOR_DIFFICULTY):
+        """log_base is the error margin indicator difficulty (2+)"""
+        self.strategy = get_strategy_table(log_base)
+        self.reset()
+
+    def reset(self):
+        """Forget all hints, ready for a new game"""
+        # The lowest and highest possible target for red, green, blue
+        self.lows = [0, 0, 0]
+        self.highs = [MAX_DIFF, MAX_DIFF, MAX_DIFF]
+
+    def sizes(self):
+        """How many possible values each colour still has"""
+        return [high - low + 1 for low, high in zip(self.lows, self.highs)]
+
+    def next_guess(self):
+        """The guess to make next, as (red, green, blue)"""
+        best_offset = self.strategy.best_offset
+        guess = []
+        for low, high in zip(self.lows, self.highs):
+            size = high - low + 1
+            guess.append(low + best_offset[size])
+        return tuple(guess)
+
+    def update(self, guess, margins):
+        """Narrow down the possible targets using a hint
+            guess is the (red, green, blue) that was guessed
+            margins are the hints for that guess (see GuessResult)
+        """
+        bands = self.strategy.bands
+        for i in range(3):
+            low_diff, high_diff = bands[margins[i]]
+            # target = guess - diff
+            self.lows[i] = max(self.lows[i], guess[i] - high_diff)
+            self.highs[i] = min(self.highs[i], guess[i] - low_diff)
+            if self.lows[i] > self.highs[i]:
+                raise ValueError("The hints contradict each other")
+
+    def worst_case_remaining(self):
+        """The most guesses that could still be needed"""
+        worst_case = self.strategy.worst_case
+        return max(worst_case[size] for size in self.sizes())
+
+    def win_chance(self, guesses_left):
+        """The chance of finding the target within guesses_left more
+            guesses, following this solver
+        """
+        chance = 1.0
+        for size in self.sizes():
+            chance *= self.strategy.chance_within(size, guesses_left)
+        return chance
+
+    def expected_remaining(self):
+        """The average number of guesses still needed, ie the average
+            of the slowest colour
+        """
+        most = self.worst_case_remaining()
+        # The average of a count is the sum of the chances it is more
+        # than 0, 1, 2...
+        return sum(1 - self.win_chance(guesses) for guesses in range(most))
+
+
+def play_game(engine, solver=None):
+    """Plays a GameEngine to the end with a StandardSolver
+        Returns the engine, so its won/score etc can be checked
+    """
+    if solver is None:
+        solver = StandardSolver(engine.log_base)
+    else:
+        solver.reset()
+    while not engine.game_over:
+        guess = solver.next_guess()
+        result = engine.guess_rgb(*guess)
+        if not engine.game_over:
+            solver.update(guess, result.margins)
+    return engine
+
+
+def worst_case_guesses(log_base=ERR_INDICATOR_DIFFICULTY):
+    """The fewest guesses that always find any target in Standard mode"""
+    return get_strategy_table(log_base).worst_case[CHANNEL_SIZE]
+
+
+def is_winnable(max_guesses=MAX_ALLOWED_GUESSES,
+                log_base=ERR_INDICATOR_DIFFICULTY):
+    """Can every Standard game be won within max_guesses?"""
+    return worst_case_guesses(log_base) <= max_guesses
+
+
+# Report on the current settings
+if __name__ == "__main__":
+    solver = StandardSolver(ERR_INDICATOR_DIFFICULTY)
+    print(f"Log base {ERR_INDICATOR_DIFFICULTY},"
+          f" {MAX_ALLOWED_GUESSES} guesses allowed")
+    print(f"Worst case: {worst_case_guesses(ERR_INDICATOR_DIFFICULTY)}"
+          " guesses")
+    print(f"Average: {solver.expected_remaining():.3f} guesses")
+    print(f"Chance of winning: {solver.win_chance(MAX_ALLOWED_GUESSES):.4%}")
+    print("Winnable every time:", is_winnable(MAX_ALLOWED_GUESSES,
+                                              ERR_INDICATOR_DIFFICULTY))
+    engine = play_game(GameEngine(DIFFICULTY_STANDARD))
+    print(f"Sample game: {engine.target_colour} found in"
+          f" {engine.guess_count} guesses, accuracy {engine.accuracy}")
@@ -0,0 +1,165 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: Runs asyncio coroutines alongside the Tk main loop
+# ======================================
+"""An asyncio event loop that runs inside the Tk main loop.
+
+Tk can only be used from the thread running mainloop, and anything slow
+in a Tk callback (eg reading a file from a network drive, or talking to
+the score server) freezes the window. Instead, a screen starts a
+coroutine with spawn(), which awaits the slow part:
+
+    async def load_scores(self):
+        scores = await game.async_loop.run_blocking(store.all_scores)
+        self.display_scores(scores)
+
+The asyncio loop is stepped from after() while any coroutine is
+running, so coroutines run on the Tk thread and can use widgets
+directly, and blocking calls passed to run_blocking are run on a
+background thread in the meantime. They are run one at a time in the
+order they were made, so a read started after a write always sees what
+was written.
+"""
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+"""Constants."""
+
+# How often (in milliseconds) to step the asyncio loop while coroutines
+# are running
+STEP_INTERVAL_MS = 10
+# How long (in seconds) to wait for unfinished coroutines (eg saving a
+# score) when closing
+STOP_TIMEOUT = 5
+
+log = logging.getLogger(__name__)
+
+
+class TkAsyncLoop:
+    """An asyncio loop stepped by the Tk main loop"""
+
+    def __init__(self, tk_root, step_interval=STEP_INTERVAL_MS,
+                 error_handler=None):
+        """tk_root is the Tk window, used for after()
+            step_interval is how often to step the loop (ms)
+            error_handler is called (on the Tk thread) with anything a
+             coroutine raises that it didn't handle itself, eg to show
+             it to the player
+        """
+        self.tk_root = tk_root
+        self.step_interval = step_interval
+        self.error_handler = error_handler
+        self.loop = asyncio.new_event_loop()
+        # Blocking calls are run here, one at a time, in order
+        self.executor = ThreadPoolExecutor(max_workers=1,
+                                           thread_name_prefix="Blocking")
+        # The coroutines still running
+        self.tasks = set()
+        # The running coroutines that belong to each widget
+        self.owned_tasks = {}
+        # The results of run_blocking_once, by key
+        self.once_results = {}
+        # Is a step waiting to happen (or happening)?
+        self.stepping = False
+
+    def spawn(self, coroutine, owner=None):
+        """Start running a coroutine.
+            owner is a widget the coroutine belongs to, if it is
+             destroyed (eg the player leaves the screen) the coroutine
+             is cancelled
+            Returns the asyncio Task
+        """
+        task = self.loop.create_task(self.report_errors(coroutine))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        if owner is not None:
+            if owner not in self.owned_tasks:
+                # Only bound once for each widget, since screens that
+                # are kept (see HexGame.switch_frame) spawn again and
+                # again
+                self.owned_tasks[owner] = set()
+                owner.bind("<Destroy>",
+                           lambda event: self.cancel_owned(owner)
+                           if event.widget is owner else None,
+                           add="+")
+            self.owned_tasks[owner].add(task)
+            task.add_done_callback(self.owned_tasks[owner].discard)
+        if not self.stepping:
+            self.stepping = True
+            self.tk_root.after_idle(self.step)
+        return task
+
+    def cancel_owned(self, owner):
+        """Cancel every coroutine belonging to a widget being destroyed"""
+        for task in self.owned_tasks.pop(owner, ()):
+            task.cancel()
+
+    async def report_errors(self, coroutine):
+        """Run a coroutine, logging anything it raises (and passing it
+            to error_handler) rather than losing it inside asyncio
+        """
+        try:
+            return await coroutine
+        except Exception as e:  # Nobody else will see it
+            log.exception("Error in a background job")
+            if self.error_handler is not None:
+                self.error_handler(e)
+
+    def run_blocking(self, function, *args):
+        """Run function(*args) on the background thread.
+            Returns an awaitable for its result
+        """
+        return self.loop.run_in_executor(self.executor,
+                                         functools.partial(function, *args))
+
+    def run_blocking_once(self, key, function, *args):
+        """Run function(*args) on the background thread the first time
+            this is called for key (eg to open a file that's kept open),
+            and give the same result every time after that. If it
+            raised, it is run again next time.
+            Returns an awaitable for its result
+        """
+        future = self.once_results.get(key)
+        if future is None or \
+                (future.done() and (future.cancelled() or
+                                    future.exception() is not None)):
+            future = self.run_blocking(function, *args)
+            self.once_results[key] = future
+        # Shielded, so cancelling one coroutine waiting for it doesn't
+        # cancel it for the others
+        return asyncio.shield(future)
+
+    def once_result(self, key):
+        """The result run_blocking_once gave for key, or None if it
+            hasn't finished (or failed)
+        """
+        future = self.once_results.get(key)
+        if future is None or not future.done() or future.cancelled() or \
+                future.exception() is not None:
+            return None
+        return future.result()
+
+    def step(self):
+        """Run everything in the asyncio loop that is ready to run, and
+            come back later if there are still coroutines running
+        """
+        # stop() is handled after the callbacks that are already
+        # waiting, so this runs one pass of the loop
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+        if self.tasks:
+            self.tk_root.after(self.step_interval, self.step)
+        else:
+            self.stepping = False
+
+    def stop(self):
+        """Finish any outstanding work (eg saving a score) and close the
+            loop. Called when the window is closing.
+        """
+        if self.tasks:
+            self.loop.run_until_complete(
+                asyncio.wait(list(self.tasks), timeout=STOP_TIMEOUT))
+        self.executor.shutdown(wait=True)
+        self.loop.close()
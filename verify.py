@@ -0,0 +1,209 @@
+# =====================================
+# Project Name: HexaGuessa
+# Description: Checks submitted scores by playing their replays again
+# ======================================
+"""Score verification.
+
+A score is only accepted along with the replay of the game it came from
+(see replay.py). The replay is played again with the game rules and the
+score is accepted if the game was won under the official rules and
+ended with exactly the accuracy claimed, so a leaderboard shared between
+sites never has to trust a number worked out by a client.
+
+verify_batch checks a list of submissions in this process, VerifyPool
+spreads big lists across a process pool, and add_verified_scores adds
+the ones that pass to a score store.
+
+A submission file has one JSON line per score, eg
+    {"difficulty": "Standard", "player_name": "Jo", "score": 91.37,
+     "replay": "<the replay's bytes, base64 encoded>"}
+
+    python verify.py submissions.jsonl --store highscores.json
+"""
+import argparse
+import base64
+import hashlib
+import json
+import sys
+import time
+from collections import namedtuple
+from multiprocessing import Pool
+
+from gameengine import ERR_INDICATOR_DIFFICULTY, MAX_ALLOWED_GUESSES
+from replay import (DIFFICULTY_CODES, GUESSES_START, REPLAY_VERSION,
+                    encode_replay, fast_replay, replay_from_engine)
+
+"""Constants."""
+
+# How many submissions each worker checks at a time
+DEFAULT_CHUNK_SIZE = 2000
+
+# A score sent in for the leaderboard.
+# replay is the bytes of the game's replay (replay.encode_replay)
+Submission = namedtuple("Submission", ["difficulty", "player_name",
+                                       "score", "replay"])
+
+
+def submission_for(engine, player_name):
+    """The submission for a game won with a GameEngine"""
+    return Submission(engine.difficulty,
+                      player_name,
+                      engine.accuracy,
+                      encode_replay(replay_from_engine(engine)))
+
+
+def submission_id(submission):
+    """A name for the game a submission came from (a hash of its
+        replay), the same however many times it is sent
+    """
+    return hashlib.sha256(submission.replay).hexdigest()
+
+
+def claim_id(submission):
+    """A name for everything a submission says (its difficulty, player
+        name, score and replay), so a game sent again can be told apart
+        from someone else's claim to the same replay
+    """
+    claim = json.dumps(submission_to_json(submission), sort_keys=True)
+    return hashlib.sha256(claim.encode("utf-8")).hexdigest()
+
+
+def submission_to_json(submission):
+    """A submission as a dict that can be written as JSON"""
+    return {"difficulty": submission.difficulty,
+            "player_name": submission.player_name,
+            "score": submission.score,
+            "replay": base64.b64encode(submission.replay).decode("ascii")}
+
+
+def submission_from_json(data):
+    """A submission from a dict read from JSON"""
+    return Submission(data["difficulty"],
+                      data["player_name"],
+                      data["score"],
+                      base64.b64decode(data["replay"]))
+
+
+def verify_submission(submission):
+    """Does a submission's replay win under the official rules and end
+        with the score claimed?
+    """
+    data = submission.replay
+    if len(data) < GUESSES_START or \
+            (len(data) - GUESSES_START) % 3 != 0:
+        return False
+    # The header must match the official rules and the difficulty the
+    # score is for (so Practice games, with no limit on guesses, never
+    # pass)
+    if data[0] != REPLAY_VERSION or \
+            data[1] >= len(DIFFICULTY_CODES) or \
+            DIFFICULTY_CODES[data[1]] != submission.difficulty or \
+            data[2] != ERR_INDICATOR_DIFFICULTY or \
+            data[3] != MAX_ALLOWED_GUESSES:
+        return False
+    try:
+        result = fast_replay(data)
+    except ValueError:  # Guesses after the game ended
+        return False
+    return result.won and result.accuracy == submission.score
+
+
+def verify_batch(submissions):
+    """Check a list of submissions
+        Returns a list saying whether each one passed
+    """
+    return [verify_submission(submission) for submission in submissions]
+
+
+class VerifyPool:
+    """Checks submissions across a pool of worker processes"""
+
+    def __init__(self, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """workers is the number of processes, None for one per core
+            chunk_size is how many submissions each worker checks at a
+             time
+        """
+        self.chunk_size = chunk_size
+        self.pool = Pool(workers)
+
+    def verify(self, submissions):
+        """Check a list of submissions
+            Returns a list saying whether each one passed, in order
+        """
+        chunks = [submissions[start:start + self.chunk_size]
+                  for start in range(0, len(submissions), self.chunk_size)]
+        passed = []
+        for chunk_passed in self.pool.imap(verify_batch, chunks):
+            passed.extend(chunk_passed)
+        return passed
+
+    def close(self):
+        """Stop the worker processes"""
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def add_verified_scores(store, submissions, pool=None):
+    """Add the submissions that pass to a score store (any of the
+        stores in scorestore.py), the others are turned away
+        pool is a VerifyPool, or None to check them in this process
+        Returns a list saying whether each one passed
+    """
+    # A score server checks them itself (see remotescores.py)
+    if hasattr(store, "add_submissions"):
+        return store.add_submissions(submissions)
+    if pool is None:
+        passed = verify_batch(submissions)
+    else:
+        passed = pool.verify(submissions)
+    accepted = [(submission.difficulty,
+                 submission.player_name,
+                 submission.score)
+                for submission, ok in zip(submissions, passed) if ok]
+    if accepted:
+        store.add_scores(accepted)
+    return passed
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(
+        description="Check submitted HexaGuessa scores against their"
+                    " replays")
+    parser.add_argument("submissions",
+                        help="JSON lines file of submissions")
+    parser.add_argument("--store",
+                        help="high score file to add the scores that"
+                             " pass to")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int,
+                        default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    with open(args.submissions, "r") as submissions_file:
+        submissions = [submission_from_json(json.loads(line))
+                       for line in submissions_file if line.strip()]
+    start = time.perf_counter()
+    with VerifyPool(args.workers, args.chunk_size) as pool:
+        if args.store:
+            # Imported here, so checking alone doesn't need a store
+            from scorestore import open_score_store
+            passed = add_verified_scores(open_score_store(args.store),
+                                         submissions,
+                                         pool)
+        else:
+            passed = pool.verify(submissions)
+    seconds = time.perf_counter() - start
+    print(f"{sum(passed)} of {len(submissions)} submissions passed"
+          f" ({len(submissions) / seconds:.0f} checked per second)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()